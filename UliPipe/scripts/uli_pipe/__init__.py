@@ -1,14 +1,25 @@
 import sys
+import time
 
 ASSETS_TYPES = ("01_character", "02_prop", "03_item", "04_enviro", "05_module", "06_fx")
+# Sources modified after this are reloaded by reload_module
+_LOADED_AT = time.time()
 
 
-def reload_module(name="uli_pipe"):
-    """Reload a module and its submodules from a given module name.
+def reload_module(name="uli_pipe", full: bool = False):
+    """Reload the modules changed since they were loaded, and the modules importing them.
+
+    Open windows stay open and run the new code.
 
     Args:
-        name (str): Module name. Default value is "uli_pipe".
+        name (str): Module name, only used with full. Default value is "uli_pipe".
+        full (bool): Remove the module and its submodules from the loaded modules
+            instead, so they are all imported again on next use. Default value is False.
     """
+    if not full:
+        from .reloader import reload_changed
+
+        return reload_changed()
     for module in sys.modules.copy():
         if module.startswith(name):
             del sys.modules[module]
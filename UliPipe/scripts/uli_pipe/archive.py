@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from .settings import get_setting
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+LOCAL_EDITS_PATH = Path(tempfile.gettempdir()) / "ulipipe_edits"
+
+# Kept by uli_pipe.reload_module, the background work goes on
+_KEEP_ON_RELOAD = ("_queue", "_pending", "_pending_lock", "_worker")
+_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_worker = None
+
+
+def is_compressed(path: Path):
+    return path.suffix in COMPRESSED_SUFFIXES
+
+
+def display_name(filename: str):
+    """Return the name of a version as shown to the artist, without the compression suffix."""
+    for suffix in COMPRESSED_SUFFIXES:
+        if filename.endswith(suffix):
+            return filename[: -len(suffix)]
+    return filename
+
+
+def resolve_version(scene_dirpath: Path, version_file: str):
+    """Find a version on disk, compressed or not.
+
+    Args:
+        scene_dirpath (Path): Directory of the versions.
+        version_file (str): Name of the version, such as 'name_dept_E_001.ma'.
+
+    Returns:
+        Path: Path of the file, None if the version does not exist.
+    """
+    for name in (version_file, *(version_file + suffix for suffix in COMPRESSED_SUFFIXES)):
+        path = scene_dirpath / name
+        if path.exists():
+            return path
+    return None
+
+
+def version_names(scene_dirpath: Path):
+    """List the versions of a directory as shown to the artist, compressed ones included.
+
+    Hidden pipeline files, such as the versions manifest, are left out.
+    """
+    names = set()
+    for path in scene_dirpath.iterdir():
+        if not path.name.startswith(".") and not path.name.endswith(".part"):
+            names.add(display_name(path.name))
+    return list(names)
+
+
+def _version_number(filename: str):
+    name = display_name(filename)
+    try:
+        return int(Path(name).stem.split("_E_")[-1])
+    except ValueError:
+        return None
+
+
+def compress_file(path: Path):
+    """Compress a file next to itself and remove the original.
+
+    zstd is used when the zstandard module is available, gzip otherwise.
+
+    Returns:
+        Path: Path of the compressed file.
+    """
+    suffix = ".zst" if zstandard is not None else ".gz"
+    compressed_path = path.with_name(path.name + suffix)
+    part_path = path.with_name(compressed_path.name + ".part")
+
+    with open(path, "rb") as source:
+        if zstandard is not None:
+            with open(part_path, "wb") as destination:
+                zstandard.ZstdCompressor(level=10).copy_stream(source, destination)
+        else:
+            with gzip.open(part_path, "wb", compresslevel=6) as destination:
+                shutil.copyfileobj(source, destination, length=1024 * 1024)
+    # Keep the original dates so the version history stays readable
+    shutil.copystat(path, part_path)
+    os.replace(part_path, compressed_path)
+    path.unlink()
+    return compressed_path
+
+
+def decompress_to_temp(path: Path):
+    """Decompress a version into the local temp directory.
+
+    The local copy is reused as long as the compressed file did not change.
+
+    Returns:
+        Path: Path of the decompressed local file.
+    """
+    # One folder per edit folder, the departments of different assets or shots share names
+    key = hashlib.sha1(path.parent.absolute().as_posix().encode("utf-8")).hexdigest()[:16]
+    local_dirpath = LOCAL_EDITS_PATH / key
+    local_dirpath.mkdir(parents=True, exist_ok=True)
+    local_path = local_dirpath / display_name(path.name)
+    if local_path.exists() and local_path.stat().st_mtime == path.stat().st_mtime:
+        return local_path
+
+    part_path = local_path.with_name(local_path.name + ".part")
+    with open(part_path, "wb") as destination:
+        if path.suffix == ".zst":
+            if zstandard is None:
+                raise RuntimeError(f"The 'zstandard' module is needed to open '{path.name}'")
+            with open(path, "rb") as source:
+                zstandard.ZstdDecompressor().copy_stream(source, destination)
+        else:
+            with gzip.open(path, "rb") as source:
+                shutil.copyfileobj(source, destination, length=1024 * 1024)
+    shutil.copystat(path, part_path)
+    os.replace(part_path, local_path)
+    return local_path
+
+
+def compress_old_edits(scene_dirpath: Path, keep: int):
+    """Compress all the edits of a directory except the latest ones.
+
+    Args:
+        scene_dirpath (Path): Edit directory of an asset or shot department.
+        keep (int): Number of latest versions left uncompressed, at least 1.
+
+    Returns:
+        list: Paths of the new compressed files.
+    """
+    versions = []
+    for path in scene_dirpath.iterdir():
+        number = _version_number(path.name)
+        if number is not None and path.is_file():
+            versions.append((number, path))
+    versions.sort()
+
+    compressed = []
+    for _, path in versions[: -max(keep, 1)]:
+        if not is_compressed(path) and not path.name.endswith(".part"):
+            compressed.append(compress_file(path))
+    return compressed
+
+
+def _work():
+    while True:
+        scene_dirpath, keep = _queue.get()
+        with _pending_lock:
+            _pending.discard(scene_dirpath)
+        try:
+            compress_old_edits(scene_dirpath, keep)
+        except OSError as error:
+            print(f"Could not compress the old edits of '{scene_dirpath}': {error}")
+        _queue.task_done()
+
+
+def schedule_compression(scene_dirpath: Path):
+    """Compress the old edits of a directory on the background worker.
+
+    Does nothing unless the 'compress_edits_keep' setting is a number of versions.
+    """
+    keep = get_setting("compress_edits_keep")
+    if not keep:
+        return
+
+    global _worker
+    with _pending_lock:
+        if scene_dirpath in _pending:
+            return
+        _pending.add(scene_dirpath)
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name="UliPipeCompression", daemon=True)
+            _worker.start()
+    _queue.put((scene_dirpath, int(keep)))
@@ -0,0 +1,237 @@
+from collections import defaultdict
+
+from uli_pipe.vendor.Qt import QtCore, QtWidgets
+
+from .trace import trace_phase
+
+# Names are indexed by their substrings of this length, shorter queries scan every name
+GRAM_SIZE = 3
+
+
+class NameIndex:
+    """Case insensitive substring search over names grouped by sequence or asset type.
+
+    Each name is indexed by its trigrams, a query only checks the names holding
+    all of its trigrams instead of every name.
+
+    Args:
+        entries (iterable): (group, name) pairs.
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda i: (i[0].lower(), i[1].lower()))
+        self.lower_names = [name.lower() for _, name in self.entries]
+        self.grams = defaultdict(set)
+        for entry_id, name in enumerate(self.lower_names):
+            for i in range(len(name) - GRAM_SIZE + 1):
+                self.grams[name[i : i + GRAM_SIZE]].add(entry_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, text: str):
+        """Find the names containing a text.
+
+        Returns:
+            dict: {group: [names]}, in alphabetical order.
+        """
+        text = text.strip().lower()
+        if len(text) < GRAM_SIZE:
+            entry_ids = [i for i, name in enumerate(self.lower_names) if text in name]
+        else:
+            postings = sorted(
+                (self.grams.get(text[i : i + GRAM_SIZE], set()) for i in range(len(text) - GRAM_SIZE + 1)),
+                key=len,
+            )
+            candidates = postings[0].intersection(*postings[1:])
+            # The trigrams can all be there without being next to each other
+            entry_ids = sorted(i for i in candidates if text in self.lower_names[i])
+
+        matches = {}
+        for entry_id in entry_ids:
+            group, name = self.entries[entry_id]
+            matches.setdefault(group, []).append(name)
+        return matches
+
+
+class _Node:
+    __slots__ = ("name", "parent", "row", "children", "loaded")
+
+    def __init__(self, name: str, parent=None, row: int = 0):
+        self.name = name
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self.loaded = parent is not None
+
+
+class LazyTreeModel(QtCore.QAbstractItemModel):
+    """Two level tree listing groups first, the items of a group are only loaded when it is expanded.
+
+    Args:
+        groups (list): Names of the groups, such as the sequences.
+        load_items (callable): Returns the item names of a group, such as its shots.
+    """
+
+    def __init__(self, groups: list, load_items, parent=None):
+        super().__init__(parent)
+        self.groups = list(groups)
+        self.load_items = load_items
+        self._items = {}
+        self._roots = [_Node(group, row=row) for row, group in enumerate(self.groups)]
+
+    def set_filter(self, matches: dict = None):
+        """Only show some items, all the groups are shown again when None.
+
+        Args:
+            matches (dict): {group: [names]}, such as a NameIndex result.
+        """
+        self.beginResetModel()
+        if matches is None:
+            self._roots = [_Node(group, row=row) for row, group in enumerate(self.groups)]
+        else:
+            self._roots = []
+            for row, (group, names) in enumerate(matches.items()):
+                node = _Node(group, row=row)
+                node.children = [_Node(name, node, i) for i, name in enumerate(names)]
+                node.loaded = True
+                self._roots.append(node)
+        self.endResetModel()
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else None
+
+    def _children(self, node):
+        return self._roots if node is None else node.children
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        children = self._children(self._node(parent))
+        if column != 0 or not 0 <= row < len(children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index):
+        node = self._node(index)
+        if node is None or node.parent is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.parent.row, 0, node.parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._children(self._node(parent)))
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if node is None:
+            return bool(self._roots)
+        if node.parent is not None:
+            return False
+        return not node.loaded or bool(node.children)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node is not None and not node.loaded
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node is None or node.loaded:
+            return
+        node.loaded = True
+        # Items stay cached once loaded, clearing the search does not list them again
+        if node.name not in self._items:
+            self._items[node.name] = self.load_items(node.name)
+        names = self._items[node.name]
+        if not names:
+            return
+        self.beginInsertRows(parent, 0, len(names) - 1)
+        node.children = [_Node(name, node, i) for i, name in enumerate(names)]
+        self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        node = self._node(index)
+        if node is None or role != QtCore.Qt.DisplayRole:
+            return None
+        return node.name
+
+    def item(self, index):
+        """Return the (group, name) of an index, None for a group."""
+        node = self._node(index)
+        if node is None or node.parent is None:
+            return None
+        return node.parent.name, node.name
+
+
+class EntityBrowser(QtWidgets.QWidget):
+    """Search field over a lazy tree of groups and items, such as sequences and shots.
+
+    The search index is only built on the first search.
+
+    Args:
+        groups (list): Names of the groups.
+        load_items (callable): Returns the item names of a group.
+        load_entries (callable): Returns every (group, name) pair, for the search index.
+    """
+
+    item_changed = QtCore.Signal()
+
+    def __init__(self, groups: list, load_items, load_entries, placeholder: str = "Search...", parent=None):
+        super().__init__(parent)
+        self.load_entries = load_entries
+        self.name_index = None
+
+        self.search = QtWidgets.QLineEdit()
+        self.search.setPlaceholderText(placeholder)
+        self.search.setClearButtonEnabled(True)
+        self.model = LazyTreeModel(groups, load_items, self)
+        self.view = QtWidgets.QTreeView()
+        self.view.setHeaderHidden(True)
+        self.view.setUniformRowHeights(True)
+        self.view.setModel(self.model)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.search)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        self.search.textChanged.connect(self.filter_items)
+        self.view.selectionModel().currentChanged.connect(lambda: self.item_changed.emit())
+
+    def filter_items(self, text: str):
+        if not text.strip():
+            self.model.set_filter(None)
+        else:
+            if self.name_index is None:
+                with trace_phase("index"):
+                    self.name_index = NameIndex(self.load_entries())
+            self.model.set_filter(self.name_index.search(text))
+            self.view.expandAll()
+        self.item_changed.emit()
+
+    def current_item(self):
+        """Return the (group, name) of the selected item, None if no item is selected."""
+        return self.model.item(self.view.currentIndex())
+
+    def select_item(self, group: str, name: str):
+        """Select an item, listing its group if needed.
+
+        Returns:
+            bool: False if the item is not in the browser.
+        """
+        for row in range(self.model.rowCount()):
+            group_index = self.model.index(row, 0)
+            if self.model.data(group_index) != group:
+                continue
+            if self.model.canFetchMore(group_index):
+                self.model.fetchMore(group_index)
+            for child_row in range(self.model.rowCount(group_index)):
+                index = self.model.index(child_row, 0, group_index)
+                if self.model.data(index) == name:
+                    self.view.setCurrentIndex(index)
+                    self.view.scrollTo(index)
+                    return True
+        return False
@@ -0,0 +1,327 @@
+import getpass
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from .archive import display_name
+from .manifest import read_manifest
+from .project_path import get_project_path, parse_scene_path
+from .settings import get_setting
+
+CATALOG_NAME = ".ulipipe_catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created REAL,
+    PRIMARY KEY (type, name)
+);
+CREATE TABLE IF NOT EXISTS shots (
+    name TEXT PRIMARY KEY,
+    sequence TEXT NOT NULL,
+    created REAL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    department TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    version INTEGER,
+    author TEXT,
+    timestamp REAL,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    mtime REAL
+);
+CREATE INDEX IF NOT EXISTS assets_type ON assets (type);
+CREATE INDEX IF NOT EXISTS versions_lookup ON versions (name, department, stage, version);
+CREATE INDEX IF NOT EXISTS versions_time ON versions (stage, timestamp);
+"""
+
+
+def catalog_enabled():
+    return bool(get_setting("catalog"))
+
+
+@contextmanager
+def connect(project_path: Path = None):
+    """Open the catalog of a project, committing on success.
+
+    The database is in WAL mode so any number of artists can read it while one writes.
+
+    Args:
+        project_path (Path): Root folder of the project. Default is the current project.
+    """
+    project_path = project_path or get_project_path()
+    connection = sqlite3.connect(project_path / CATALOG_NAME, timeout=30)
+    connection.row_factory = sqlite3.Row
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        yield connection
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _write_through(write):
+    # Only when the catalog is enabled, and a failure must never block the pipeline
+    if not catalog_enabled():
+        return False
+    try:
+        write()
+    except (OSError, sqlite3.Error) as error:
+        print(f"Could not update the UliPipe catalog: {error}")
+        return False
+    return True
+
+
+def _sync_folder(db, project_path: Path, folder_path: Path, table: str, group_column: str):
+    # Match the rows of an asset type or sequence to its subfolders, then record the
+    # date of the folder, which is read before listing it so a later change shows
+    mtime = folder_path.stat().st_mtime
+    names = {i.name: i.stat().st_mtime for i in folder_path.iterdir() if i.is_dir()}
+    group = folder_path.name
+    rows = db.execute(f"SELECT name FROM {table} WHERE {group_column} = ?", (group,)).fetchall()
+    known = {row["name"] for row in rows}
+    db.executemany(
+        f"DELETE FROM {table} WHERE {group_column} = ? AND name = ?",
+        [(group, i) for i in known - set(names)],
+    )
+    db.executemany(
+        f"INSERT OR REPLACE INTO {table} ({group_column}, name, created) VALUES (?, ?, ?)",
+        [(group, i, names[i]) for i in set(names) - known],
+    )
+    db.execute(
+        "INSERT OR REPLACE INTO folders (path, mtime) VALUES (?, ?)",
+        (folder_path.relative_to(project_path).as_posix(), mtime),
+    )
+
+
+def is_current(*folder_paths: Path, project_path: Path = None):
+    """Tell if the catalog lists the content of asset type or sequence folders.
+
+    A folder changed since the catalog last listed it, such as by an artist without
+    the catalog or by hand, makes the catalog out of date for it.
+    """
+    project_path = project_path or get_project_path()
+    with connect(project_path) as db:
+        rows = db.execute("SELECT path, mtime FROM folders").fetchall()
+    recorded = {row["path"]: row["mtime"] for row in rows}
+    for folder_path in folder_paths:
+        try:
+            mtime = folder_path.stat().st_mtime
+        except OSError:
+            return False
+        if recorded.get(folder_path.relative_to(project_path).as_posix()) != mtime:
+            return False
+    return True
+
+
+def record_asset(name: str, asset_type: str, project_path: Path = None):
+    def write():
+        project = project_path or get_project_path()
+        with connect(project) as db:
+            db.execute(
+                "INSERT OR REPLACE INTO assets (type, name, created) VALUES (?, ?, ?)",
+                (asset_type, name, time.time()),
+            )
+            # The other assets of the type may have been created without the catalog
+            _sync_folder(db, project, project / "04_asset" / asset_type, "assets", "type")
+
+    return _write_through(write)
+
+
+def record_shot(name: str, sequence: str, project_path: Path = None):
+    def write():
+        project = project_path or get_project_path()
+        with connect(project) as db:
+            db.execute(
+                "INSERT OR REPLACE INTO shots (name, sequence, created) VALUES (?, ?, ?)",
+                (name, sequence, time.time()),
+            )
+            _sync_folder(db, project, project / "05_shot" / sequence, "shots", "sequence")
+
+    return _write_through(write)
+
+
+def _version_row(project_path: Path, scene_path: Path, version: int, author: str, timestamp: float, size: int):  # fmt: skip
+    info = parse_scene_path(project_path, scene_path)
+    if info is None:
+        return None
+    return (
+        scene_path.relative_to(project_path).as_posix(),
+        info["kind"],
+        info["group"],
+        info["name"],
+        info["department"],
+        info["stage"],
+        version,
+        author,
+        timestamp,
+        size,
+    )
+
+
+def record_version(scene_path: Path, version: int, project_path: Path = None):
+    """Add a saved edit or a publish to the catalog.
+
+    Args:
+        scene_path (Path): Path of the new scene.
+        version (int): Version number, the edit number for a publish.
+        project_path (Path): Root folder of the project. Default is the current project.
+    """
+
+    def write():
+        root = project_path or get_project_path()
+        size = scene_path.stat().st_size if scene_path.exists() else None
+        row = _version_row(root, scene_path, version, getpass.getuser(), time.time(), size)
+        if row is None:
+            return
+        with connect(root) as db:
+            db.execute("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    return _write_through(write)
+
+
+def latest_edit(asset: str, department: str, project_path: Path = None):
+    """Return the path of the latest edit of an asset or shot department, None if there is none."""
+    project_path = project_path or get_project_path()
+    with connect(project_path) as db:
+        row = db.execute(
+            "SELECT path FROM versions WHERE name = ? AND department = ? AND stage = 'edit' "
+            "ORDER BY version DESC LIMIT 1",
+            (asset, department),
+        ).fetchone()
+    return project_path / row["path"] if row else None
+
+
+def publishes_since(since, project_path: Path = None):
+    """List the publishes made after a date.
+
+    Args:
+        since (datetime | float): Date, or time in seconds since the epoch.
+
+    Returns:
+        list: One dict per publish, the latest first.
+    """
+    if isinstance(since, datetime):
+        since = since.timestamp()
+    with connect(project_path) as db:
+        rows = db.execute(
+            "SELECT * FROM versions WHERE stage = 'publish' AND timestamp >= ? ORDER BY timestamp DESC",
+            (since,),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def assets_of_type(asset_type: str, project_path: Path = None):
+    """List the names of the assets of a type, sorted alphabetically."""
+    with connect(project_path) as db:
+        rows = db.execute(
+            "SELECT name FROM assets WHERE type = ? ORDER BY name COLLATE NOCASE", (asset_type,)
+        ).fetchall()
+    return [row["name"] for row in rows]
+
+
+def shots(project_path: Path = None):
+    """List the shots of the project as (sequence, name) pairs, sorted alphabetically."""
+    with connect(project_path) as db:
+        rows = db.execute(
+            "SELECT sequence, name FROM shots ORDER BY sequence COLLATE NOCASE, name COLLATE NOCASE"
+        ).fetchall()
+    return [(row["sequence"], row["name"]) for row in rows]
+
+
+def _scan_scene_dir(project_path: Path, scene_dirpath: Path):
+    # Rows of all the scenes of an edit or publish directory, backups excluded
+    rows = []
+    manifest = read_manifest(scene_dirpath)
+    with os.scandir(scene_dirpath) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name.endswith(".part") or not entry.is_file():
+                continue
+            name = display_name(entry.name)
+            info = manifest.get(name, {})
+            version = info.get("version")
+            if version is None and "_E_" in name:
+                try:
+                    version = int(Path(name).stem.split("_E_")[-1])
+                except ValueError:
+                    pass
+            stat = entry.stat()
+            path = scene_dirpath / entry.name
+            row = _version_row(project_path, path, version, info.get("author"), stat.st_mtime, stat.st_size)  # fmt: skip
+            if row:
+                rows.append(row)
+    return rows
+
+
+def _scan_entity(project_path: Path, entity_path: Path, kind: str):
+    scenes_path = entity_path / "maya" / "scenes"
+    if kind == "asset":
+        scene_dirpaths = list(scenes_path.glob("edit/*")) + list(scenes_path.glob("publish/*"))
+    else:
+        scene_dirpaths = list(scenes_path.glob("*/edit")) + list(scenes_path.glob("*/publish"))
+    created = entity_path.stat().st_mtime
+    rows = []
+    for scene_dirpath in scene_dirpaths:
+        if scene_dirpath.is_dir():
+            rows += _scan_scene_dir(project_path, scene_dirpath)
+    return kind, entity_path.parent.name, entity_path.name, created, rows
+
+
+def reconcile(project_path: Path = None, workers: int = 16):
+    """Rebuild the catalog from the project folders.
+
+    The assets and shots are scanned in parallel, then the catalog is replaced in
+    a single transaction so readers never see it half built.
+
+    Returns:
+        tuple: Number of assets, shots and versions found.
+    """
+    project_path = project_path or get_project_path()
+    entities = []
+    # Dates read before listing, see is_current
+    folders = []
+    for asset_type_path in (project_path / "04_asset").iterdir():
+        if asset_type_path.is_dir() and not asset_type_path.name.startswith("_"):
+            relative = asset_type_path.relative_to(project_path).as_posix()
+            folders.append((relative, asset_type_path.stat().st_mtime))
+            entities += [(i, "asset") for i in asset_type_path.iterdir() if i.is_dir()]
+    for sequence_path in (project_path / "05_shot").iterdir():
+        if sequence_path.is_dir() and sequence_path.name.startswith("sq"):
+            relative = sequence_path.relative_to(project_path).as_posix()
+            folders.append((relative, sequence_path.stat().st_mtime))
+            entities += [(i, "shot") for i in sequence_path.iterdir() if i.is_dir()]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda i: _scan_entity(project_path, *i), entities))
+
+    assets, shots, versions = [], [], []
+    for kind, group, name, created, rows in results:
+        if kind == "asset":
+            assets.append((group, name, created))
+        else:
+            shots.append((name, group, created))
+        versions += rows
+
+    with connect(project_path) as db:
+        db.execute("DELETE FROM assets")
+        db.execute("DELETE FROM shots")
+        db.execute("DELETE FROM versions")
+        db.execute("DELETE FROM folders")
+        db.executemany("INSERT INTO folders VALUES (?, ?)", folders)
+        db.executemany("INSERT INTO assets VALUES (?, ?, ?)", assets)
+        db.executemany("INSERT INTO shots VALUES (?, ?, ?)", shots)
+        db.executemany("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", versions)  # fmt: skip
+    return len(assets), len(shots), len(versions)
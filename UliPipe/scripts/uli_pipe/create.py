@@ -6,7 +6,9 @@ from maya import cmds
 
 from uli_pipe.vendor.Qt import QtCore, QtWidgets
 
+from .catalog import record_asset, record_shot
 from .project_path import get_project_path
+from .trace import trace_phase, traced
 
 try:
     from shiboken6 import wrapInstance
@@ -14,6 +16,7 @@ except ImportError:
     from shiboken2 import wrapInstance
 
 
+@traced
 def create_asset(name: str, asset_type: str, asset_dirpath: Path):
     # Create asset path
     asset_path = asset_dirpath / asset_type / name
@@ -35,7 +38,9 @@ def create_asset(name: str, asset_type: str, asset_dirpath: Path):
 
     # Copy the asset template and paste it with the new name in the correct directory
     template_path = asset_dirpath / "_template_workspace_asset"
-    shutil.copytree(template_path, asset_path)
+    with trace_phase("copy_template", asset=asset_path.as_posix()):
+        shutil.copytree(template_path, asset_path)
+    record_asset(name, asset_type, project_path=asset_dirpath.parent)
 
     cmds.inViewMessage(
         message=f"<hl>Asset '{name}' has been created</hl>",
@@ -48,6 +53,7 @@ def create_asset(name: str, asset_type: str, asset_dirpath: Path):
     return True
 
 
+@traced
 def create_shot(sequence_number: int, shot_number: int, shot_dirpath: Path):
     # Format the shot name (correct nomenclature)
     padded_sequence_number = str(sequence_number).zfill(4)
@@ -72,7 +78,9 @@ def create_shot(sequence_number: int, shot_number: int, shot_dirpath: Path):
 
     # Copy the shot template and paste it with the new name in the correct directory
     template_path = shot_dirpath / "_template_workspace_shot"
-    shutil.copytree(template_path, shot_path)
+    with trace_phase("copy_template", shot=shot_path.as_posix()):
+        shutil.copytree(template_path, shot_path)
+    record_shot(shot_name, sequence_path.name, project_path=shot_dirpath.parent)
 
     cmds.inViewMessage(
         message=f"<hl>Shot '{shot_name}' has been created</hl>",
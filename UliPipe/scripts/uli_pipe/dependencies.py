@@ -0,0 +1,284 @@
+"""Index of the references between the scenes of a project, built without Maya.
+
+Can be run from any Python: python -m uli_pipe.dependencies <project> [--asset name]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import shlex
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .filelock import FileLock
+
+INDEX_NAME = ".ulipipe_dependencies.json"
+LOCK_NAME = ".ulipipe_dependencies.lock"
+SCENE_SUFFIXES = (".ma", ".mb")
+PROJECT_ROOTS = ("04_asset", "05_shot")
+
+# The references are declared before the first node of a Maya ASCII file
+MA_HEADER_END = re.compile(rb"^\s*createNode\s", re.MULTILINE)
+MA_STATEMENT_END = re.compile(rb";\s*$", re.MULTILINE)
+# Copy number Maya adds when a file is referenced several times, such as 'chair_P.mb{1}'
+COPY_NUMBER = re.compile(r"\{\d+\}$")
+
+# Maya binary files are IFF files: groups (FOR4, LIS4, ...) hold a type tag and
+# chunks, the 8 variants use 64 bit sizes and 8 byte alignment
+IFF_GROUPS = {b"FOR4", b"LIS4", b"CAT4", b"PROP", b"FOR8", b"LIS8", b"CAT8"}
+IFF_REFERENCE = b"FREF"
+IFF_HEADER_FORMS = {b"HEAD", b"FREF"}
+
+
+def _project_relative(path: str):
+    # Paths from another machine or drive still match from the project folders on
+    path = COPY_NUMBER.sub("", path.replace("\\", "/"))
+    parts = path.split("/")
+    for root in PROJECT_ROOTS:
+        if root in parts:
+            return "/".join(parts[parts.index(root) :])
+    return path
+
+
+def _ma_references(data):
+    references = []
+    header_end = MA_HEADER_END.search(data)
+    header = data[: header_end.start() if header_end else len(data)]
+    start = 0
+    for statement_end in MA_STATEMENT_END.finditer(header):
+        lines = header[start : statement_end.start()].splitlines()
+        start = statement_end.end()
+        # Comments such as '//Maya ASCII 2024 scene' are not part of the next statement
+        statement = b" ".join(i.strip() for i in lines if not i.lstrip().startswith(b"//")).strip()
+        # Only the top level references, '-rdi' lines describe the nested ones
+        if not statement.startswith(b"file ") or b" -r " not in statement:
+            continue
+        try:
+            arguments = shlex.split(statement.decode("utf-8", "replace"), posix=True)
+        except ValueError:
+            continue
+        references.append(arguments[-1])
+    return references
+
+
+def _mb_references(data):
+    references = []
+    size_format, alignment = (">Q", 8) if data[:4] in (b"FOR8", b"LIS8", b"CAT8") else (">I", 4)
+    header_size = 4 + struct.calcsize(size_format)
+
+    def walk(start, end, top_level):
+        offset = start
+        while offset + header_size <= end:
+            tag = data[offset : offset + 4]
+            (size,) = struct.unpack_from(size_format, data, offset + 4)
+            body = offset + header_size
+            if tag in IFF_GROUPS:
+                form_type = data[body : body + 4]
+                # The nodes come after the header and references, nothing to read there
+                if top_level and form_type not in IFF_HEADER_FORMS:
+                    return
+                walk(body + 4, body + size, False)
+            elif tag == IFF_REFERENCE:
+                strings = [i.decode("utf-8", "replace") for i in data[body : body + size].split(b"\0")]
+                paths = [i for i in strings if COPY_NUMBER.sub("", i).endswith(SCENE_SUFFIXES)]
+                if paths:
+                    references.append(paths[0])
+            offset = body + size + (-size % alignment)
+
+    if data[:4] in IFF_GROUPS:
+        (size,) = struct.unpack_from(size_format, data, 4)
+        walk(header_size + 4, min(header_size + size, len(data)), True)
+    return references
+
+
+def scene_references(scene_path: Path):
+    """Read the references of a Maya scene without opening it in Maya.
+
+    Only the start of the file is read: the header of a .ma up to its first node,
+    the header forms and reference chunks of a .mb.
+
+    Returns:
+        list: Paths of the referenced files, as written in the scene.
+    """
+    with open(scene_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if scene_path.suffix == ".ma":
+                return _ma_references(data)
+            return _mb_references(data)
+
+
+def _scene_files(entity_path: Path):
+    # Scenes of an asset or shot, compressed edits and publish backups left out
+    scenes = []
+    for dirpath, dirnames, filenames in os.walk(entity_path / "maya" / "scenes"):
+        dirnames[:] = [i for i in dirnames if i != "backup" and not i.startswith(".")]
+        for filename in filenames:
+            if filename.endswith(SCENE_SUFFIXES) and not filename.startswith("."):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                scenes.append((Path(path), stat.st_mtime, stat.st_size))
+    return scenes
+
+
+def read_index(project_path: Path):
+    """Read the dependency index of a project.
+
+    Returns:
+        dict: {scene: {"mtime", "size", "references"}}, scenes and references relative
+            to the project.
+    """
+    try:
+        with open(project_path / INDEX_NAME, "r") as file:
+            return json.load(file).get("scenes", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(project_path: Path, scenes: dict):
+    # Write next to the index then swap, readers never see a partial file
+    part_path = project_path / (INDEX_NAME + ".part")
+    with open(part_path, "w") as file:
+        json.dump({"scenes": scenes}, file, indent=1)
+    os.replace(part_path, project_path / INDEX_NAME)
+
+
+def update_index(project_path: Path = None, workers: int = 16):
+    """Bring the dependency index of a project up to date.
+
+    The scenes are listed in parallel, only the new ones and the ones whose date or
+    size changed since the last update are read again.
+
+    Returns:
+        dict: The updated index, see read_index.
+    """
+    if project_path is None:
+        from .project_path import get_project_path
+
+        project_path = get_project_path()
+    project_path = Path(project_path)
+
+    entities = []
+    for root in PROJECT_ROOTS:
+        if not (project_path / root).exists():
+            continue
+        for group_path in (project_path / root).iterdir():
+            if group_path.is_dir() and not group_path.name.startswith(("_", ".")):
+                entities += [i for i in group_path.iterdir() if i.is_dir()]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scenes = [i for entity_scenes in executor.map(_scene_files, entities) for i in entity_scenes]
+
+        with FileLock(project_path / LOCK_NAME, timeout=60.0, stale=600.0):
+            index = read_index(project_path)
+            updated = {}
+            changed = []
+            for path, mtime, size in scenes:
+                key = path.relative_to(project_path).as_posix()
+                entry = index.get(key)
+                if entry and entry["mtime"] == mtime and entry["size"] == size:
+                    updated[key] = entry
+                else:
+                    changed.append((key, path, mtime, size))
+
+            def read(scene):
+                key, path, mtime, size = scene
+                try:
+                    references = sorted({_project_relative(i) for i in scene_references(path)})
+                except (OSError, ValueError, struct.error) as error:
+                    print(f"Could not read the references of '{key}': {error}")
+                    references = []
+                return key, {"mtime": mtime, "size": size, "references": references}
+
+            updated.update(executor.map(read, changed))
+            # Deleted scenes are dropped by not being carried over
+            if updated != index:
+                _write_index(project_path, updated)
+    return updated
+
+
+def dependents(index: dict, *scenes: str):
+    """List the scenes referencing some scenes, directly or through other references.
+
+    Args:
+        index (dict): The dependency index, see read_index.
+        scenes (str): Scenes relative to the project, such as
+            '04_asset/prop/chair/maya/scenes/publish/modeling/chair_modeling_P.mb'.
+    """
+    referencing = {}
+    for key, entry in index.items():
+        for reference in entry["references"]:
+            referencing.setdefault(reference, []).append(key)
+
+    found = set()
+    pending = list(scenes)
+    while pending:
+        for key in referencing.get(pending.pop(), ()):
+            if key not in found:
+                found.add(key)
+                pending.append(key)
+    return sorted(found)
+
+
+def shots_using_asset(index: dict, asset_name: str):
+    """List the shots with a scene referencing a scene of an asset, directly or not."""
+    asset_scenes = [i for i in index if i.split("/")[0] == "04_asset" and i.split("/")[2] == asset_name]
+    shots = {i.split("/")[2] for i in dependents(index, *asset_scenes) if i.startswith("05_shot/")}
+    return sorted(shots)
+
+
+def references_of(index: dict, *scenes: str):
+    """List the scenes some scenes reference, directly or through other references.
+
+    Args:
+        index (dict): The dependency index, see read_index.
+        scenes (str): Scenes relative to the project.
+    """
+    found = set()
+    pending = list(scenes)
+    while pending:
+        entry = index.get(pending.pop())
+        for reference in entry["references"] if entry else ():
+            if reference not in found:
+                found.add(reference)
+                pending.append(reference)
+    return sorted(found)
+
+
+def assets_of_shot(index: dict, shot_name: str):
+    """List the assets used by the scenes of a shot, directly or not, as (type, name) pairs.
+
+    An asset referenced by a set or a character referenced in the shot is listed too.
+    """
+    shot_scenes = [i for i in index if i.split("/")[0] == "05_shot" and i.split("/")[2] == shot_name]
+    assets = set()
+    for reference in references_of(index, *shot_scenes):
+        reference_parts = reference.split("/")
+        if reference_parts[0] == "04_asset" and len(reference_parts) > 2:
+            assets.add((reference_parts[1], reference_parts[2]))
+    return sorted(assets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update and query the UliPipe dependency index")
+    parser.add_argument("project", type=Path, help="Root folder of the project")
+    parser.add_argument("--asset", help="List the shots using this asset")
+    parser.add_argument("--shot", help="List the assets used by this shot")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    index = update_index(args.project, workers=args.workers)
+    if args.asset:
+        print("\n".join(shots_using_asset(index, args.asset)))
+    if args.shot:
+        print("\n".join(f"{i[0]}/{i[1]}" for i in assets_of_shot(index, args.shot)))
+    if not args.asset and not args.shot:
+        print(f"{len(index)} scenes indexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import platform
+import time
+from pathlib import Path
+
+
+def _remove_stale(path: Path, stale: float):
+    """Remove a lock file older than the stale delay, only if it is still the one found stale.
+
+    The file is first renamed to a name of this session, so among sessions taking over
+    the same lock only one removes it, and a new lock taken in the meantime is given back.
+
+    Returns:
+        bool: False if the lock file is still there and not stale.
+    """
+    try:
+        found = path.stat()
+    except FileNotFoundError:
+        return True
+    if time.time() - found.st_mtime <= stale:
+        return False
+    claimed = path.with_name(f"{path.name}.{platform.node()}-{os.getpid()}-{time.time_ns()}.stale")
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        # Another session took it over first
+        return True
+    renamed = claimed.stat()
+    if (renamed.st_ino, renamed.st_mtime_ns) != (found.st_ino, found.st_mtime_ns):
+        # A new lock was taken between the check and the rename, it is put back
+        try:
+            os.link(claimed, path)
+        except OSError:
+            pass
+        claimed.unlink()
+        return False
+    claimed.unlink()
+    return True
+
+
+class FileLock:
+    """Lock shared between artists through a lock file created with O_CREAT | O_EXCL.
+
+    A lock file older than the stale delay is considered left behind by a crashed
+    session and is taken over.
+
+    Args:
+        path (Path): Path of the lock file.
+        timeout (float): Seconds to wait for the lock before raising a TimeoutError.
+        stale (float): Age in seconds after which an existing lock file is ignored.
+    """
+
+    def __init__(self, path: Path, timeout: float = 10.0, stale: float = 60.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.stale = stale
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                descriptor = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                _remove_stale(self.path, self.stale)
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not acquire the lock '{self.path}'")
+                time.sleep(0.05)
+                continue
+            with os.fdopen(descriptor, "w") as file:
+                file.write(f"{platform.node()} {os.getpid()}")
+            return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+
+
+RESERVATION_SUFFIX = ".reserved"
+# Staged saves can take until the next session to land, a reservation lasts a day
+RESERVATION_STALE = 24 * 3600.0
+
+
+def reservation_path(path: Path):
+    """Return the hidden placeholder reserving a path, such as '.chair_modeling_E_004.ma.reserved'."""
+    return path.with_name(f".{path.name}{RESERVATION_SUFFIX}")
+
+
+def reserve(path: Path, stale: float = RESERVATION_STALE):
+    """Reserve a file name, such as the next version, without locking the folder.
+
+    The placeholder is created with O_CREAT | O_EXCL, so among artists reserving the
+    same name at the same time exactly one succeeds. A placeholder older than the stale
+    delay is considered left behind by a crashed session and is taken over.
+
+    Returns:
+        bool: True if the name is now reserved by this session, False if it is already taken.
+    """
+    placeholder = reservation_path(path)
+    for _ in range(2):
+        try:
+            descriptor = os.open(placeholder, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not _remove_stale(placeholder, stale):
+                return False
+            continue
+        with os.fdopen(descriptor, "w") as file:
+            file.write(f"{platform.node()} {os.getpid()}")
+        return True
+    return False
+
+
+def release(path: Path):
+    """Remove the reservation of a file name, once the file is written or given up."""
+    try:
+        reservation_path(path).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,96 @@
+import getpass
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from .filelock import FileLock
+
+MANIFEST_NAME = ".ulipipe_versions.json"
+LOCK_NAME = ".ulipipe_versions.lock"
+
+
+def read_manifest(scene_dirpath: Path):
+    """Read the versions manifest of an edit or publish directory.
+
+    Returns:
+        dict: {filename: entry} for each recorded version, empty if there is no manifest.
+    """
+    try:
+        with open(scene_dirpath / MANIFEST_NAME, "r") as file:
+            return json.load(file).get("versions", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(scene_dirpath: Path, versions: dict):
+    # Write next to the manifest then swap, readers never see a partial file
+    part_path = scene_dirpath / (MANIFEST_NAME + ".part")
+    with open(part_path, "w") as file:
+        json.dump({"versions": versions}, file, indent=1)
+    os.replace(part_path, scene_dirpath / MANIFEST_NAME)
+
+
+def _update_manifest(scene_dirpath: Path, update):
+    # The manifest is best effort, a failure must never block a save
+    try:
+        with FileLock(scene_dirpath / LOCK_NAME):
+            versions = read_manifest(scene_dirpath)
+            update(versions)
+            _write_manifest(scene_dirpath, versions)
+    except (OSError, TimeoutError) as error:
+        print(f"Could not update the versions manifest of '{scene_dirpath}': {error}")
+        return False
+    return True
+
+
+def record_version(
+    scene_path: Path, version: int, source: str = None, thumbnail: Path = None
+):
+    """Add a saved or published scene to the manifest of its directory.
+
+    Args:
+        scene_path (Path): Path of the new scene.
+        version (int): Version number, the edit number for a publish.
+        source (str): File name of the scene it was saved from.
+        thumbnail (Path): Path of a thumbnail image.
+    """
+    entry = {
+        "version": version,
+        "author": getpass.getuser(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "size": scene_path.stat().st_size if scene_path.exists() else None,
+        "source": source,
+        "thumbnail": thumbnail.as_posix() if thumbnail else None,
+    }
+
+    def update(versions):
+        versions[scene_path.name] = entry
+
+    return _update_manifest(scene_path.parent, update)
+
+
+def rename_version(scene_dirpath: Path, old_name: str, new_name: str):
+    """Move a manifest entry to a new name, such as a publish moved to its backup folder."""
+
+    def update(versions):
+        if old_name in versions:
+            versions[new_name] = versions.pop(old_name)
+
+    return _update_manifest(scene_dirpath, update)
+
+
+def describe_version(entry: dict):
+    """Format a manifest entry for the version browser."""
+    if not entry:
+        return "No information for this version"
+    parts = [f"v{entry.get('version', 0):03d}"]
+    if entry.get("author"):
+        parts.append(entry["author"])
+    if entry.get("timestamp"):
+        parts.append(entry["timestamp"].replace("T", " ")[:16])
+    if entry.get("size") is not None:
+        parts.append(f"{entry['size'] / (1024 * 1024):.1f} MB")
+    if entry.get("source"):
+        parts.append(f"from {entry['source']}")
+    return " - ".join(parts)
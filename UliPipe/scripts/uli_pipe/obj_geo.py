@@ -2,12 +2,16 @@ from pathlib import Path
 
 from maya import cmds, mel
 
+from uli_pipe.trace import annotate_file, trace_phase, traced
+from uli_pipe.transfer import staged_destination
 from uli_pipe.vendor.Qt import QtWidgets
 
 
+@traced
 def export_obj():
     # Check if the current scene is within an existing asset
     current_path = Path(cmds.file(query=True, sceneName=True))
+    current_path = staged_destination(current_path) or current_path
     if "04_asset" not in current_path.as_posix():
         msg = "<hl>Current scene is not part of an asset, could not export</hl>"
         cmds.inViewMessage(
@@ -36,15 +40,18 @@ def export_obj():
     # Get export path
     new_path = Path(current_path.as_posix().split("maya")[0])
     folder_path = new_path / "sculpt" / "zbrush" / "input"
-    export_path = Path(QtWidgets.QFileDialog.getSaveFileName(dir=folder_path.as_posix(), filter="OBJ Files (*.obj)")[0])  # fmt: skip
+    with trace_phase("ui"):
+        export_path = Path(QtWidgets.QFileDialog.getSaveFileName(dir=folder_path.as_posix(), filter="OBJ Files (*.obj)")[0])  # fmt: skip
     if export_path != Path("."):
         # Export
         cmds.select(filter_dag)
         if not cmds.pluginInfo("objExport", query=True, loaded=True):
             cmds.loadPlugin("objExport")
-        mel.eval(
-            f'file -force -options "groups=1;ptgroups=0;materials=0;smoothing=1;normals=1" -type "OBJexport" -pr -es "{export_path.as_posix()}";'
-        )
+        with trace_phase("export"):
+            mel.eval(
+                f'file -force -options "groups=1;ptgroups=0;materials=0;smoothing=1;normals=1" -type "OBJexport" -pr -es "{export_path.as_posix()}";'
+            )
+        annotate_file(export_path, key="export")
         msg = f"<hl>Export successful to '{export_path.as_posix()}'</hl>"
         cmds.inViewMessage(
             statusMessage=msg,
@@ -58,6 +65,7 @@ def export_obj():
 def import_obj():
     # Check if the current scene is within an existing asset
     current_path = Path(cmds.file(query=True, sceneName=True))
+    current_path = staged_destination(current_path) or current_path
     if "04_asset" not in current_path.as_posix():
         msg = "<hl>Current scene is not part of an asset, could not import</hl>"
         cmds.inViewMessage(
@@ -1,4 +1,5 @@
 import shutil
+import sqlite3
 from pathlib import Path
 
 from maya import OpenMayaUI as omui
@@ -7,7 +8,15 @@ from maya import cmds, mel
 from uli_pipe.vendor.Qt import QtCore, QtWidgets
 from uli_pipe.vendor.Qt.QtWidgets import QLabel
 
-from .project_path import get_project_path
+from . import catalog
+from .archive import decompress_to_temp, display_name, is_compressed, resolve_version, version_names
+from .browser import EntityBrowser
+from .manifest import describe_version, read_manifest
+from .project_path import get_project_path, parse_scene_path
+from .proxy import load_references, proxy_enabled
+from .reference_cache import cache_enabled, resolve_scene_references
+from .trace import annotate_file, trace_phase, traced
+from .transfer import staged_destination
 
 try:
     from shiboken6 import wrapInstance
@@ -16,36 +25,61 @@ except ImportError:
 
 
 # Backend ---------------------------------------------------------------------
+@traced
 def open_scene(scene_path: Path):
     # Check if current scene has changes
     if cmds.file(query=True, modified=True):
         # Prompt user to save
-        result = cmds.confirmDialog(
-            title="Save Changes",
-            message="Save changes to current scene?",
-            button=["Save", "Don't Save", "Cancel"],
-            defaultButton="Save",
-            cancelButton="Cancel",
-            dismissString="Cancel",
-        )
+        with trace_phase("ui"):
+            result = cmds.confirmDialog(
+                title="Save Changes",
+                message="Save changes to current scene?",
+                button=["Save", "Don't Save", "Cancel"],
+                defaultButton="Save",
+                cancelButton="Cancel",
+                dismissString="Cancel",
+            )
         if result == "Save":
-            cmds.file(save=True)
+            with trace_phase("maya_io", action="save"):
+                cmds.file(save=True)
         elif result == "Cancel":
             return False
 
+    # Compressed edits are opened from a local copy, renamed to their pipeline path afterward
+    pipeline_path = scene_path
+    if is_compressed(scene_path):
+        pipeline_path = scene_path.with_name(display_name(scene_path.name))
+        with trace_phase("decompress"):
+            scene_path = decompress_to_temp(scene_path)
+
     # Get the maya project path
-    asset_path = str(scene_path).split("maya")
+    asset_path = str(pipeline_path).split("maya")
     if len(asset_path) > 1:
         maya_project_path = Path(asset_path[0]) / "maya"
         # Set the maya project
         if maya_project_path.exists():
             mel.eval(f'setProject "{maya_project_path.as_posix()}"')
 
+    # Read the references from their local copies when they are up to date
+    if cache_enabled():
+        with trace_phase("reference_cache"):
+            resolve_scene_references(scene_path)
+
     # Open the new file
-    cmds.file(scene_path, open=True, force=True)
+    annotate_file(scene_path)
+    with trace_phase("maya_io", action="open"):
+        if proxy_enabled():
+            # The references are loaded afterward, proxies first
+            cmds.file(scene_path, open=True, force=True, loadReferenceDepth="none")
+            load_references()
+        else:
+            cmds.file(scene_path, open=True, force=True)
+    if pipeline_path != scene_path:
+        cmds.file(rename=pipeline_path)
     return True
 
 
+@traced
 def open_asset(name: str, asset_type: str, department: str, version_file: str, asset_dirpath: Path):
     # Create the path to the scene directory
     scene_dirpath = asset_dirpath / asset_type / name / "maya" / "scenes" / "edit" / department
@@ -54,8 +88,9 @@ def open_asset(name: str, asset_type: str, department: str, version_file: str, a
         raise NotADirectoryError(f"The path '{scene_dirpath}' to the asset '{name}' does not exist")
 
     # Check if there is a scene in the directory, if not create it, if yes pick the latest version
-    dir_paths = list(scene_dirpath.iterdir())
-    dir_files = [i.stem for i in dir_paths]
+    with trace_phase("scan", directory=scene_dirpath.as_posix()):
+        dir_paths = list(scene_dirpath.iterdir())
+    dir_files = [i.stem for i in dir_paths if not i.name.startswith(".")]
     # IF no files, create the first one
     if len(dir_files) == 0:
         first_file_name = f"{name}_{department}_E_001.ma"
@@ -73,14 +108,15 @@ def open_asset(name: str, asset_type: str, department: str, version_file: str, a
             dragKill=True,
         )
     else:
-        open_path = scene_dirpath / version_file
-        if not open_path.exists():
+        open_path = resolve_version(scene_dirpath, version_file)
+        if open_path is None:
             raise FileExistsError(f"The version '{version_file}' does not exist")
 
     # Open the scene
     open_scene(scene_path=open_path)
 
 
+@traced
 def open_shot(name: str, department: str, shot_dirpath: Path, version_file: str):
     # Create the path to the scene directory
     scene_dirpath = shot_dirpath / name / "maya" / "scenes" / department / "edit"
@@ -89,8 +125,9 @@ def open_shot(name: str, department: str, shot_dirpath: Path, version_file: str)
         raise NotADirectoryError(f"The path '{scene_dirpath}' to the shot '{name}' does not exist")
 
     # Check if there is a scene in the directory, if not create it, if yes pick the latest version
-    dir_paths = list(scene_dirpath.iterdir())
-    dir_files = [i.stem for i in dir_paths]
+    with trace_phase("scan", directory=scene_dirpath.as_posix()):
+        dir_paths = list(scene_dirpath.iterdir())
+    dir_files = [i.stem for i in dir_paths if not i.name.startswith(".")]
     # IF no files, create the first one
     if len(dir_files) == 0:
         first_file_name = f"{name}_{department}_E_001.ma"
@@ -108,14 +145,31 @@ def open_shot(name: str, department: str, shot_dirpath: Path, version_file: str)
             dragKill=True,
         )
     else:
-        open_path = scene_dirpath / version_file
-        if not open_path.exists():
+        open_path = resolve_version(scene_dirpath, version_file)
+        if open_path is None:
             raise FileExistsError(f"The version '{version_file}' does not exist")
 
     # Open the scene
     open_scene(scene_path=open_path)
 
 
+def current_scene_entity(kind: str):
+    """Return the asset or shot of the open scene, see parse_scene_path.
+
+    Args:
+        kind (str): 'asset' or 'shot', None is returned for a scene of the other kind.
+    """
+    scene_name = cmds.file(query=True, sceneName=True)
+    if not scene_name:
+        return None
+    # A staged save is still on the local disk, it stands for its project path
+    scene_path = staged_destination(Path(scene_name)) or Path(scene_name)
+    info = parse_scene_path(get_project_path(), scene_path)
+    if info is None or info["kind"] != kind:
+        return None
+    return info
+
+
 # Frontend -----------------------------------------------------------------------
 def maya_main_window():
     maya_main_window_ptr = omui.MQtUtil.mainWindow()
@@ -126,32 +180,36 @@ class OpenAsset(QtWidgets.QDialog):
     def __init__(self, *args, **kwargs):
         super().__init__(parent=maya_main_window(), *args, **kwargs)
         self.setWindowTitle("Open Asset")
-        self.resize(450, 250)
+        self.resize(450, 450)
+        self.versions_manifest = {}
 
         self.create_widgets()
         self.create_layouts()
         self.create_connections()
+        self.select_current_scene()
 
     def create_widgets(self):
         # Create the labels
-        self.asset_type_label = QLabel("Asset type: ")
-        self.asset_type_label.setAlignment(QtCore.Qt.AlignRight)
-        self.asset_name_label = QLabel("Asset name: ")
-        self.asset_name_label.setAlignment(QtCore.Qt.AlignRight)
         self.department_label = QLabel("Department: ")
         self.department_label.setAlignment(QtCore.Qt.AlignRight)
         self.asset_version_label = QLabel("Version: ")
         self.asset_version_label.setAlignment(QtCore.Qt.AlignRight)
+        self.asset_version_info = QLabel("")
+        self.asset_version_info.setAlignment(QtCore.Qt.AlignRight)
+
+        # Create the asset browser, the assets of a type are listed when it is expanded
+        self.asset_browser = EntityBrowser(
+            groups=["character", "FX", "item", "prop", "set"],
+            load_items=self.assets_names,
+            load_entries=self.assets_entries,
+            placeholder="Search an asset...",
+        )
 
         # Create the combo boxes
-        self.asset_type = QtWidgets.QComboBox()
-        self.asset_type.addItems(["character", "FX", "item", "prop", "set"])
         self.department = QtWidgets.QComboBox()
         self.department.addItems(
             ["assetLayout", "cloth", "dressing", "groom", "lookdev", "modeling", "rig"]
         )
-        self.asset_name = QtWidgets.QComboBox()
-        self.update_assets_names()
         self.asset_version = QtWidgets.QComboBox()
         self.update_assets_versions()
 
@@ -163,16 +221,6 @@ class OpenAsset(QtWidgets.QDialog):
         self.main_layout = QtWidgets.QVBoxLayout()
         self.setLayout(self.main_layout)
 
-        # Asset type layout
-        self.asset_type_layout = QtWidgets.QHBoxLayout()
-        self.asset_type_layout.addWidget(self.asset_type_label)
-        self.asset_type_layout.addWidget(self.asset_type)
-
-        # Asset name layout
-        self.asset_name_layout = QtWidgets.QHBoxLayout()
-        self.asset_name_layout.addWidget(self.asset_name_label)
-        self.asset_name_layout.addWidget(self.asset_name)
-
         # Department layout
         self.department_layout = QtWidgets.QHBoxLayout()
         self.department_layout.addWidget(self.department_label)
@@ -184,23 +232,37 @@ class OpenAsset(QtWidgets.QDialog):
         self.asset_version_layout.addWidget(self.asset_version)
 
         # Add everything to the main layout
-        self.main_layout.addLayout(self.asset_type_layout)
-        self.main_layout.addLayout(self.asset_name_layout)
+        self.main_layout.addWidget(self.asset_browser)
         self.main_layout.addLayout(self.department_layout)
         self.main_layout.addLayout(self.asset_version_layout)
+        self.main_layout.addWidget(self.asset_version_info)
         self.main_layout.addWidget(self.open_button)
 
     def create_connections(self):
-        self.asset_type.currentIndexChanged.connect(lambda: self.update_assets_names())
-        self.asset_name.currentIndexChanged.connect(lambda: self.update_assets_versions())
+        self.asset_browser.item_changed.connect(lambda: self.update_assets_versions())
         self.department.currentIndexChanged.connect(lambda: self.update_assets_versions())
-        self.open_button.clicked.connect(
-            lambda: self.open_asset_and_close(
-                name=self.asset_name.currentText(),
-                department=self.department.currentText(),
-                asset_type=self.asset_type.currentText(),
-                version_file=self.asset_version.currentText(),
-            )
+        self.asset_version.currentIndexChanged.connect(lambda: self.update_version_info())
+        self.open_button.clicked.connect(lambda: self.open_current_asset())
+
+    def select_current_scene(self):
+        # Start from the asset and department of the open scene
+        info = current_scene_entity("asset")
+        if info is None:
+            return
+        department_index = self.department.findText(info["department"])
+        if department_index != -1:
+            self.department.setCurrentIndex(department_index)
+        self.asset_browser.select_item(info["group"], info["name"])
+
+    def open_current_asset(self):
+        item = self.asset_browser.current_item()
+        if item is None:
+            return
+        self.open_asset_and_close(
+            name=item[1],
+            department=self.department.currentText(),
+            asset_type=item[0],
+            version_file=self.asset_version.currentText(),
         )
 
     def open_asset_and_close(self, name: str, department: str, asset_type: str, version_file: str):
@@ -216,56 +278,90 @@ class OpenAsset(QtWidgets.QDialog):
             self.close()
             self.deleteLater()
 
-    def update_assets_names(self):
-        assets_path = get_project_path() / "04_asset" / self.asset_type.currentText()
-        assets_names = [i.stem for i in assets_path.iterdir()]
+    def assets_names(self, asset_type: str):
+        assets_path = get_project_path() / "04_asset" / asset_type
+        assets_names = []
+        # Ask the catalog first, an empty, unreadable or out of date catalog falls back to the folders
+        if catalog.catalog_enabled():
+            try:
+                if catalog.is_current(assets_path):
+                    assets_names = catalog.assets_of_type(asset_type)
+            except sqlite3.Error as error:
+                print(f"Could not read the UliPipe catalog: {error}")
+        if not assets_names and assets_path.exists():
+            with trace_phase("scan", directory=assets_path.as_posix()):
+                assets_names = [i.stem for i in assets_path.iterdir()]
         assets_names.sort(key=str.lower)
-        self.asset_name.clear()
-        self.asset_name.addItems(assets_names)
+        return assets_names
+
+    def assets_entries(self):
+        # All the assets of all the types, for the search index
+        return [(i, name) for i in self.asset_browser.model.groups for name in self.assets_names(i)]
 
     def update_assets_versions(self):
-        if self.asset_name.currentText() != "":
+        item = self.asset_browser.current_item()
+        if item is None:
+            self.versions_manifest = {}
+            self.asset_version.clear()
+            self.update_version_info()
+        else:
             asset_path = (
                 get_project_path()
                 / "04_asset"
-                / self.asset_type.currentText()
-                / self.asset_name.currentText()
+                / item[0]
+                / item[1]
                 / "maya"
                 / "scenes"
                 / "edit"
                 / self.department.currentText()
             )
-            versions_names = [i.name for i in asset_path.iterdir()]
+            with trace_phase("scan", directory=asset_path.as_posix()):
+                versions_names = version_names(asset_path)
+                # The manifest holds the versions information, no need to stat each file
+                self.versions_manifest = read_manifest(asset_path)
             versions_names.sort(key=str.lower)
             self.asset_version.clear()
             self.asset_version.addItems(versions_names)
             self.asset_version.setCurrentIndex(len(versions_names) - 1)
+            self.update_version_info()
+
+    def update_version_info(self):
+        entry = self.versions_manifest.get(self.asset_version.currentText())
+        self.asset_version_info.setText(describe_version(entry))
 
 
 class OpenShot(QtWidgets.QDialog):
     def __init__(self, *args, **kwargs):
         super().__init__(parent=maya_main_window(), *args, **kwargs)
         self.setWindowTitle("Open Shot")
-        self.resize(450, 250)
+        self.resize(450, 450)
+        self.versions_manifest = {}
 
         self.create_widgets()
         self.create_layouts()
         self.create_connections()
+        self.select_current_scene()
 
     def create_widgets(self):
         # Create the labels
-        self.shot_name_label = QLabel("Shot name: ")
-        self.shot_name_label.setAlignment(QtCore.Qt.AlignRight)
         self.department_label = QLabel("Department: ")
         self.department_label.setAlignment(QtCore.Qt.AlignRight)
         self.shot_version_label = QLabel("Version: ")
         self.shot_version_label.setAlignment(QtCore.Qt.AlignRight)
+        self.shot_version_info = QLabel("")
+        self.shot_version_info.setAlignment(QtCore.Qt.AlignRight)
+
+        # Create the shot browser, the shots of a sequence are listed when it is expanded
+        self.shot_browser = EntityBrowser(
+            groups=self.sequences_names(),
+            load_items=self.shots_names,
+            load_entries=self.shots_entries,
+            placeholder="Search a shot...",
+        )
 
         # Create the combo boxes
         self.department = QtWidgets.QComboBox()
         self.department.addItems(["anim", "layout", "render"])
-        self.shot_name = QtWidgets.QComboBox()
-        self.update_shots_names()
         self.shot_version = QtWidgets.QComboBox()
         self.update_shots_versions()
 
@@ -277,11 +373,6 @@ class OpenShot(QtWidgets.QDialog):
         self.main_layout = QtWidgets.QVBoxLayout()
         self.setLayout(self.main_layout)
 
-        # Shot name layout
-        self.shot_name_layout = QtWidgets.QHBoxLayout()
-        self.shot_name_layout.addWidget(self.shot_name_label)
-        self.shot_name_layout.addWidget(self.shot_name)
-
         # Department layout
         self.department_layout = QtWidgets.QHBoxLayout()
         self.department_layout.addWidget(self.department_label)
@@ -293,21 +384,37 @@ class OpenShot(QtWidgets.QDialog):
         self.shot_version_layout.addWidget(self.shot_version)
 
         # Add everything to the main layout
-        self.main_layout.addLayout(self.shot_name_layout)
+        self.main_layout.addWidget(self.shot_browser)
         self.main_layout.addLayout(self.department_layout)
         self.main_layout.addLayout(self.shot_version_layout)
+        self.main_layout.addWidget(self.shot_version_info)
         self.main_layout.addWidget(self.open_button)
 
     def create_connections(self):
-        self.open_button.clicked.connect(
-            lambda: self.open_shot_and_close(
-                name=self.shot_name.currentText(),
-                department=self.department.currentText(),
-                version_file=self.shot_version.currentText(),
-            )
-        )
-        self.shot_name.currentIndexChanged.connect(lambda: self.update_shots_versions())
+        self.open_button.clicked.connect(lambda: self.open_current_shot())
+        self.shot_browser.item_changed.connect(lambda: self.update_shots_versions())
         self.department.currentIndexChanged.connect(lambda: self.update_shots_versions())
+        self.shot_version.currentIndexChanged.connect(lambda: self.update_version_info())
+
+    def select_current_scene(self):
+        # Start from the shot and department of the open scene
+        info = current_scene_entity("shot")
+        if info is None:
+            return
+        department_index = self.department.findText(info["department"])
+        if department_index != -1:
+            self.department.setCurrentIndex(department_index)
+        self.shot_browser.select_item(info["group"], info["name"])
+
+    def open_current_shot(self):
+        item = self.shot_browser.current_item()
+        if item is None:
+            return
+        self.open_shot_and_close(
+            name=item[1],
+            department=self.department.currentText(),
+            version_file=self.shot_version.currentText(),
+        )
 
     def open_shot_and_close(self, name: str, department: str, version_file: str):
         # Call the backend function 'open_shot' and close the window afterward
@@ -321,32 +428,62 @@ class OpenShot(QtWidgets.QDialog):
             self.close()
             self.deleteLater()
 
-    def update_shots_names(self):
+    def sequences_names(self):
         shots_path = get_project_path() / "05_shot"
-        sequences = [i for i in shots_path.iterdir() if i.stem.startswith("sq")]
-        sequences.reverse()
-        shot_names = []
-        for seq in sequences:
-            shots = [i.stem for i in seq.iterdir()]
-            shot_names += shots
+        with trace_phase("scan", directory=shots_path.as_posix()):
+            sequences = [i.name for i in shots_path.iterdir() if i.name.startswith("sq")]
+        sequences.sort(key=str.lower)
+        return sequences
+
+    def shots_names(self, sequence: str):
+        sequence_path = get_project_path() / "05_shot" / sequence
+        with trace_phase("scan", directory=sequence_path.as_posix()):
+            shot_names = [i.stem for i in sequence_path.iterdir()]
         shot_names.sort(key=str.lower)
-        self.shot_name.clear()
-        self.shot_name.addItems(shot_names)
+        return shot_names
+
+    def shots_entries(self):
+        # All the shots of all the sequences, for the search index
+        sequences = self.shot_browser.model.groups
+        if catalog.catalog_enabled():
+            shots_path = get_project_path() / "05_shot"
+            try:
+                if catalog.is_current(*(shots_path / i for i in sequences)):
+                    entries = [i for i in catalog.shots() if i[0] in sequences]
+                    if entries:
+                        return entries
+            except sqlite3.Error as error:
+                print(f"Could not read the UliPipe catalog: {error}")
+        return [(i, name) for i in sequences for name in self.shots_names(i)]
 
     def update_shots_versions(self):
-        sequence = self.shot_name.currentText().split("_")[0]
+        item = self.shot_browser.current_item()
+        if item is None:
+            self.versions_manifest = {}
+            self.shot_version.clear()
+            self.update_version_info()
+            return
+        sequence, name = item
         shot_path = (
             get_project_path()
             / "05_shot"
             / sequence
-            / self.shot_name.currentText()
+            / name
             / "maya"
             / "scenes"
             / self.department.currentText()
             / "edit"
         )
-        versions_names = [i.name for i in shot_path.iterdir()]
+        with trace_phase("scan", directory=shot_path.as_posix()):
+            versions_names = version_names(shot_path)
+            # The manifest holds the versions information, no need to stat each file
+            self.versions_manifest = read_manifest(shot_path)
         versions_names.sort(key=str.lower)
         self.shot_version.clear()
         self.shot_version.addItems(versions_names)
         self.shot_version.setCurrentIndex(len(versions_names) - 1)
+        self.update_version_info()
+
+    def update_version_info(self):
+        entry = self.versions_manifest.get(self.shot_version.currentText())
+        self.shot_version_info.setText(describe_version(entry))
@@ -57,3 +57,40 @@ def get_project_path():
         )
     # If the file has a path, return it
     return Path(file_data)
+
+
+def parse_scene_path(project_path: Path, scene_path: Path):
+    """Read the asset or shot, department and stage from a scene path of the project.
+
+    Asset scenes are in '04_asset/type/name/maya/scenes/edit|publish/department' and
+    shot scenes in '05_shot/sequence/shot/maya/scenes/department/edit|publish'.
+
+    Args:
+        project_path (Path): Root folder of the project.
+        scene_path (Path): Path of the scene.
+
+    Returns:
+        dict: With the keys 'kind' ('asset' or 'shot'), 'group' (asset type or
+            sequence), 'name', 'department' and 'stage' ('edit' or 'publish'),
+            None if the path does not follow the pipeline structure.
+    """
+    try:
+        parts = Path(scene_path).relative_to(project_path).parts
+    except ValueError:
+        return None
+    if len(parts) < 8 or parts[3:5] != ("maya", "scenes"):
+        return None
+
+    if parts[0] == "04_asset" and parts[5] in ("edit", "publish"):
+        department, stage = parts[6], parts[5]
+    elif parts[0] == "05_shot" and parts[6] in ("edit", "publish"):
+        department, stage = parts[5], parts[6]
+    else:
+        return None
+    return {
+        "kind": "asset" if parts[0] == "04_asset" else "shot",
+        "group": parts[1],
+        "name": parts[2],
+        "department": department,
+        "stage": stage,
+    }
@@ -0,0 +1,199 @@
+from pathlib import Path
+
+from maya import cmds
+
+from .settings import get_setting
+
+PROXY_DIRNAME = "proxy"
+PROXY_TAG = "proxy"
+FULL_TAG = "full"
+# Namespaces the artist switched to the full publish, kept in the scene
+FULL_ASSETS_INFO = "ulipipe_full_assets"
+
+# Scene holding a single gpuCache node, so the proxy can be referenced like a publish
+PROXY_SCENE = """//Maya ASCII scene
+requires maya "2022";
+requires -nodeType "gpuCache" "gpuCache" "1.0";
+createNode transform -n "{name}";
+createNode gpuCache -n "{name}Shape" -p "{name}";
+\tsetAttr ".cfn" -type "string" "{cache_path}";
+"""
+
+
+def proxy_enabled():
+    return bool(get_setting("proxy_references"))
+
+
+def proxy_path(publish_path: Path):
+    """Return the proxy scene of a publish, such as '.../publish/modeling/proxy/chair_modeling_P.ma'."""
+    return publish_path.parent / PROXY_DIRNAME / (publish_path.stem + ".ma")
+
+
+def has_proxy(publish_path: Path):
+    """Tell if a publish has a proxy written after it, an older proxy belongs to a previous publish."""
+    path = proxy_path(publish_path)
+    try:
+        return path.stat().st_mtime >= publish_path.stat().st_mtime
+    except OSError:
+        return False
+
+
+def export_proxy(nodes: list, publish_path: Path, export_dirpath: Path = None):
+    """Export nodes as the gpuCache proxy of a publish.
+
+    Writes the Alembic cache of the current frame and the scene referencing it.
+
+    Args:
+        nodes (list): Nodes to export, usually the published selection.
+        publish_path (Path): Publish the proxy belongs to.
+        export_dirpath (Path): Folder to write to, such as a staging folder. Default is
+            the proxy folder of the publish. The proxy scene always points to the cache
+            in the proxy folder.
+
+    Returns:
+        list: Paths of the written cache and scene.
+    """
+    final_path = proxy_path(publish_path)
+    export_dirpath = export_dirpath or final_path.parent
+    export_dirpath.mkdir(parents=True, exist_ok=True)
+    cmds.loadPlugin("gpuCache", quiet=True)
+
+    current_frame = cmds.currentTime(query=True)
+    cmds.gpuCache(
+        nodes,
+        startTime=current_frame,
+        endTime=current_frame,
+        optimize=True,
+        writeMaterials=True,
+        dataFormat="ogawa",
+        directory=export_dirpath.as_posix(),
+        fileName=publish_path.stem,
+    )
+    cache_path = export_dirpath / (publish_path.stem + ".abc")
+    scene_path = export_dirpath / final_path.name
+    with open(scene_path, "w") as file:
+        file.write(
+            PROXY_SCENE.format(
+                name=f"{publish_path.stem}_proxy",
+                cache_path=final_path.with_suffix(".abc").as_posix(),
+            )
+        )
+    # The scene is written last, has_proxy compares its date to the publish
+    return [cache_path, scene_path]
+
+
+def reference_proxy(publish_path: Path, namespace: str):
+    """Reference a publish with its proxy loaded, the full publish is added unloaded.
+
+    Both are proxies of the same Maya reference, the Reference Editor or switch_references
+    can swap them.
+
+    Returns:
+        str: Name of the reference node of the full publish.
+    """
+    # Deferred, the full publish is not read at all
+    reference_file = cmds.file(
+        publish_path.as_posix(), reference=True, deferReference=True, force=True, namespace=namespace
+    )
+    full_node = cmds.referenceQuery(reference_file, referenceNode=True)
+    cmds.setAttr(f"{full_node}.proxyTag", FULL_TAG, type="string")
+    proxy_node = cmds.proxyAdd(full_node, proxy_path(publish_path).as_posix(), PROXY_TAG)
+    cmds.proxySwitch(proxy_node)
+    return full_node
+
+
+def _full_assets():
+    value = cmds.fileInfo(FULL_ASSETS_INFO, query=True)
+    return set(value[0].split(";")) - {""} if value else set()
+
+
+def _proxies(reference_node: str):
+    # {tag: reference node} of the proxies sharing a reference, empty without proxies
+    managers = cmds.listConnections(f"{reference_node}.proxyMsg", type="proxyManager") or []
+    if not managers:
+        return {}
+    nodes = cmds.listConnections(f"{managers[0]}.proxyList", type="reference") or []
+    return {cmds.getAttr(f"{node}.proxyTag"): node for node in set(nodes)}
+
+
+def _top_level_references():
+    nodes = []
+    for node in cmds.ls(type="reference"):
+        if node == "sharedReferenceNode" or node.endswith("_UNKNOWN_REF_NODE_"):
+            continue
+        try:
+            if cmds.referenceQuery(node, parent=True, referenceNode=True) is None:
+                nodes.append(node)
+        except RuntimeError:
+            # Reference node without a file
+            continue
+    return nodes
+
+
+def switch_references(reference_nodes: list = None, full: bool = True):
+    """Switch references between their proxy and their full publish.
+
+    The choice is saved with the scene, load_references keeps it on the next open.
+
+    Args:
+        reference_nodes (list): Reference nodes, the ones of the selected nodes when None.
+        full (bool): Switch to the full publish, or to the proxy when False. Default value is True.
+
+    Returns:
+        list: The switched namespaces.
+    """
+    if reference_nodes is None:
+        reference_nodes = set()
+        for node in cmds.ls(selection=True):
+            if cmds.referenceQuery(node, isNodeReferenced=True):
+                reference_nodes.add(cmds.referenceQuery(node, referenceNode=True, topReference=True))
+    tag = FULL_TAG if full else PROXY_TAG
+    full_assets = _full_assets()
+    switched = []
+    for reference_node in reference_nodes:
+        proxies = _proxies(reference_node)
+        if tag not in proxies:
+            continue
+        cmds.proxySwitch(proxies[tag])
+        namespace = cmds.referenceQuery(proxies[tag], namespace=True, shortName=True)
+        if full:
+            full_assets.add(namespace)
+        else:
+            full_assets.discard(namespace)
+        switched.append(namespace)
+    cmds.fileInfo(FULL_ASSETS_INFO, ";".join(sorted(full_assets)))
+    return switched
+
+
+def load_references():
+    """Load the references of a scene opened without them, proxies first.
+
+    References without proxy get one when their publish has an up to date proxy, only
+    the assets the artist switched to full load their full publish.
+
+    Returns:
+        int: Number of references loaded as proxies.
+    """
+    full_assets = _full_assets()
+    loaded_proxies = 0
+    for reference_node in _top_level_references():
+        proxies = _proxies(reference_node)
+        if proxies:
+            # The full publish and its proxy both show up, load them once
+            if reference_node != proxies.get(FULL_TAG, reference_node):
+                continue
+            namespace = cmds.referenceQuery(reference_node, namespace=True, shortName=True)
+            tag = FULL_TAG if namespace in full_assets or PROXY_TAG not in proxies else PROXY_TAG
+            cmds.proxySwitch(proxies[tag])
+            loaded_proxies += tag == PROXY_TAG
+            continue
+
+        namespace = cmds.referenceQuery(reference_node, namespace=True, shortName=True)
+        publish_path = Path(cmds.referenceQuery(reference_node, filename=True, withoutCopyNumber=True))
+        if namespace in full_assets or not has_proxy(publish_path):
+            cmds.file(loadReference=reference_node)
+            continue
+        cmds.setAttr(f"{reference_node}.proxyTag", FULL_TAG, type="string")
+        cmds.proxySwitch(cmds.proxyAdd(reference_node, proxy_path(publish_path).as_posix(), PROXY_TAG))
+        loaded_proxies += 1
+    return loaded_proxies
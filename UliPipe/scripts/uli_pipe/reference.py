@@ -4,6 +4,10 @@ from maya import OpenMayaUI as omui
 from maya import cmds
 
 from uli_pipe.project_path import get_project_path
+from uli_pipe.proxy import has_proxy, proxy_enabled, reference_proxy, switch_references
+from uli_pipe.reference_cache import cache_enabled, resolve
+from uli_pipe.reference_update import update_references
+from uli_pipe.trace import annotate_file, trace_phase, traced
 from uli_pipe.vendor.Qt import QtCore, QtWidgets
 from uli_pipe.vendor.Qt.QtWidgets import QLabel
 
@@ -16,10 +20,21 @@ except ImportError:
 # Backend ---------------------------------------------------------------------
 def reference_scene(scene_path: Path):
     # Reference the new file
-    cmds.file(scene_path, reference=True, force=True, namespace=scene_path.stem)
+    annotate_file(scene_path)
+    # Read from the local copy when it is up to date, the reference keeps the share path
+    if cache_enabled():
+        with trace_phase("reference_cache"):
+            resolve(scene_path)
+    with trace_phase("maya_io", action="reference"):
+        # Light gpuCache proxy first, the full publish is loaded on demand
+        if proxy_enabled() and has_proxy(scene_path):
+            reference_proxy(scene_path, namespace=scene_path.stem)
+        else:
+            cmds.file(scene_path, reference=True, force=True, namespace=scene_path.stem)
     return True
 
 
+@traced
 def reference_asset(name: str, asset_type: str, department: str, asset_dirpath: Path):
     # Create the path to the scene directory
     scene_dirpath = asset_dirpath / asset_type / name / "maya" / "scenes" / "publish" / department
@@ -28,11 +43,12 @@ def reference_asset(name: str, asset_type: str, department: str, asset_dirpath:
         raise NotADirectoryError(f"The path '{scene_dirpath}' to the asset '{name}' does not exist")
 
     # Get a list of the files in the directory
-    dir_paths = list(scene_dirpath.iterdir())
-    files_paths = []
-    for i in dir_paths:
-        if i.is_file() is True:
-            files_paths.append(i)
+    with trace_phase("scan", directory=scene_dirpath.as_posix()):
+        dir_paths = list(scene_dirpath.iterdir())
+        files_paths = []
+        for i in dir_paths:
+            if i.is_file() is True:
+                files_paths.append(i)
     filenames = []
     for i in files_paths:
         filenames.append(i.stem)
@@ -98,6 +114,13 @@ class ReferenceAsset(QtWidgets.QDialog):
         self.open_button = QtWidgets.QPushButton("Reference Asset")
         self.open_button.setFixedHeight(35)
 
+        # Create the proxy buttons, acting on the selected references
+        self.proxy_button = QtWidgets.QPushButton("Selection to Proxy")
+        self.full_button = QtWidgets.QPushButton("Selection to Full")
+
+        # Create the update button, acting on the whole scene
+        self.update_button = QtWidgets.QPushButton("Update Outdated References")
+
     def create_layouts(self):
         self.main_layout = QtWidgets.QVBoxLayout()
         self.setLayout(self.main_layout)
@@ -126,6 +149,13 @@ class ReferenceAsset(QtWidgets.QDialog):
         self.main_layout.addLayout(self.department_layout)
         self.main_layout.addWidget(self.open_button)
 
+        # Proxy layout
+        self.proxy_layout = QtWidgets.QHBoxLayout()
+        self.proxy_layout.addWidget(self.proxy_button)
+        self.proxy_layout.addWidget(self.full_button)
+        self.main_layout.addLayout(self.proxy_layout)
+        self.main_layout.addWidget(self.update_button)
+
     def create_connections(self):
         self.asset_type.currentIndexChanged.connect(lambda: self.update_assets_names())
         self.open_button.clicked.connect(
@@ -136,6 +166,10 @@ class ReferenceAsset(QtWidgets.QDialog):
             )
         )
 
+        self.proxy_button.clicked.connect(lambda: switch_references(full=False))
+        self.full_button.clicked.connect(lambda: switch_references(full=True))
+        self.update_button.clicked.connect(lambda: self.update_outdated_references())
+
     def reference_asset_and_close(self, name: str, department: str, asset_type: str):
         # Call the backend function 'open_asset' and close the window afterward
         success = reference_asset(
@@ -148,8 +182,24 @@ class ReferenceAsset(QtWidgets.QDialog):
             self.close()
             self.deleteLater()
 
+    def update_outdated_references(self):
+        # Call the backend function 'update_references' and tell the artist what changed
+        reloaded = update_references()
+        if reloaded:
+            msg = f"Updated <hl>{len(reloaded)}</hl> references: {', '.join(reloaded)}"
+        else:
+            msg = "All the references are up to date"
+        cmds.inViewMessage(
+            statusMessage=msg,
+            position="midCenter",
+            fade=True,
+            dragKill=True,
+            clickKill=True,
+        )
+
     def update_assets_names(self):
         assets_path = get_project_path() / "04_asset" / self.asset_type.currentText()
-        assets_names = [i.stem for i in assets_path.iterdir()]
+        with trace_phase("scan", directory=assets_path.as_posix()):
+            assets_names = [i.stem for i in assets_path.iterdir()]
         self.asset_name.clear()
         self.asset_name.addItems(assets_names)
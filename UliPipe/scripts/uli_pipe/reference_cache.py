@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .filelock import FileLock
+from .settings import get_setting
+from .transfer import copy_verified, file_checksum
+
+CACHE_PATH = Path(tempfile.gettempdir()) / "ulipipe_references"
+INDEX_NAME = "index.json"
+LOCK_NAME = "index.lock"
+INCOMING_DIRNAME = "incoming"
+
+# Kept by uli_pipe.reload_module, the background work goes on
+_KEEP_ON_RELOAD = ("_queue", "_pending", "_pending_lock", "_worker", "_mapped")
+_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_worker = None
+# Publish directories currently mapped to the cache, {publish dirpath: cache dirpath}
+_mapped = {}
+
+
+def cache_enabled():
+    return bool(get_setting("reference_cache"))
+
+
+def cache_root():
+    return Path(get_setting("reference_cache_path") or CACHE_PATH)
+
+
+def _entry_key(publish_path: Path):
+    # Folder of a publish in the cache, its copies are stored by content hash inside
+    return hashlib.sha1(Path(publish_path).as_posix().encode("utf-8")).hexdigest()[:16]
+
+
+def read_index(root: Path = None):
+    """Read the index of the reference cache.
+
+    Returns:
+        dict: {publish path: {"mtime", "size", "hash", "file", "last_used"}}, the file
+            being relative to the cache folder.
+    """
+    try:
+        with open((root or cache_root()) / INDEX_NAME, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_index(update, root: Path = None):
+    # Several Maya sessions of the same machine share the cache
+    root = root or cache_root()
+    root.mkdir(parents=True, exist_ok=True)
+    with FileLock(root / LOCK_NAME):
+        entries = read_index(root)
+        result = update(entries)
+        part_path = root / (INDEX_NAME + ".part")
+        with open(part_path, "w") as file:
+            json.dump(entries, file, indent=1)
+        os.replace(part_path, root / INDEX_NAME)
+    return result
+
+
+def cached_copy(publish_path: Path, entries: dict = None):
+    """Return the local copy of a publish, None if it is not cached or out of date.
+
+    A copy is out of date as soon as the publish on the share has another date or size,
+    such as when a new publish lands.
+    """
+    entry = (entries if entries is not None else read_index()).get(Path(publish_path).as_posix())
+    if entry is None:
+        return None
+    try:
+        stat = publish_path.stat()
+    except OSError:
+        return None
+    local_path = cache_root() / entry["file"]
+    if stat.st_mtime != entry["mtime"] or stat.st_size != entry["size"] or not local_path.exists():
+        return None
+    return local_path
+
+
+def resolve(publish_path: Path):
+    """Make Maya read a publish from the cache when its copy is up to date.
+
+    The publish folder is mapped to the folder of the copy with dirmap, so the scenes
+    keep the path of the share. That folder mirrors the publish folder, its other files
+    and folders (proxy, backup...) being links to the share. A missing or outdated copy
+    is fetched in the background and the share is used in the meantime.
+
+    Returns:
+        Path: Path of the local copy, None if the share is used.
+    """
+    publish_path = Path(publish_path)
+    local_path = cached_copy(publish_path)
+    if local_path is None:
+        _unmap(publish_path.parent)
+        prefetch([publish_path])
+        return None
+
+    def touch(entries):
+        entries[publish_path.as_posix()]["last_used"] = time.time()
+
+    if not _mirror(publish_path.parent, local_path.parent):
+        _unmap(publish_path.parent)
+        return None
+    _update_index(touch)
+    _map(publish_path.parent, local_path.parent)
+    return local_path
+
+
+def _mirror(publish_dirpath: Path, local_dirpath: Path):
+    # The mapped folder stands for the whole publish folder, everything but the copy links to the share
+    try:
+        names = set(os.listdir(publish_dirpath))
+        with os.scandir(local_dirpath) as entries:
+            for entry in entries:
+                if entry.is_symlink() and entry.name not in names:
+                    os.unlink(entry.path)
+        for name in names:
+            link_path = local_dirpath / name
+            if os.path.lexists(link_path):
+                continue
+            target_path = publish_dirpath / name
+            try:
+                os.symlink(target_path, link_path, target_is_directory=target_path.is_dir())
+            except FileExistsError:
+                # Linked by another Maya session
+                pass
+    except OSError as error:
+        # Such as links not allowed on Windows without the developer mode
+        print(f"Could not read '{publish_dirpath.name}' from the reference cache: {error}")
+        return False
+    return True
+
+
+def _map(publish_dirpath: Path, local_dirpath: Path):
+    from maya import cmds
+
+    if _mapped.get(publish_dirpath) == local_dirpath:
+        return
+    cmds.dirmap(enable=True)
+    cmds.dirmap(mapDirectory=(publish_dirpath.as_posix(), local_dirpath.as_posix()))
+    _mapped[publish_dirpath] = local_dirpath
+
+
+def _unmap(publish_dirpath: Path):
+    from maya import cmds
+
+    if _mapped.pop(publish_dirpath, None) is not None:
+        cmds.dirmap(unmapDirectory=publish_dirpath.as_posix())
+
+
+def cache_publish(publish_path: Path):
+    """Copy a publish to the cache, then evict the least recently used copies over the size limit.
+
+    Returns:
+        Path: Path of the local copy.
+    """
+    root = cache_root()
+    stat = publish_path.stat()
+    entry_path = root / _entry_key(publish_path)
+    incoming_path = entry_path / INCOMING_DIRNAME / publish_path.name
+    incoming_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(copy_verified(publish_path, incoming_path), incoming_path)
+
+    # The same content published again is stored once
+    content_hash = file_checksum(incoming_path)[:16]
+    local_path = entry_path / content_hash / publish_path.name
+    if local_path.exists():
+        incoming_path.unlink()
+    else:
+        local_path.parent.mkdir(exist_ok=True)
+        os.replace(incoming_path, local_path)
+
+    def record(entries):
+        entries[publish_path.as_posix()] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "hash": content_hash,
+            "file": local_path.relative_to(root).as_posix(),
+            "last_used": time.time(),
+        }
+
+    _update_index(record, root)
+    # Older copies of this publish are outdated, a scene still using one keeps it locked
+    for path in entry_path.iterdir():
+        if path.is_dir() and path.name not in (content_hash, INCOMING_DIRNAME):
+            shutil.rmtree(path, ignore_errors=True)
+    evict()
+    return local_path
+
+
+def evict(max_size: int = None):
+    """Remove the least recently used copies until the cache fits in its size limit.
+
+    Args:
+        max_size (int): Size limit in bytes. Default is the 'reference_cache_size_gb' setting.
+
+    Returns:
+        list: Publish paths removed from the cache.
+    """
+    root = cache_root()
+    if max_size is None:
+        max_size = int(get_setting("reference_cache_size_gb") * 1024**3)
+
+    def remove_oldest(entries):
+        total = 0
+        for entry in entries.values():
+            try:
+                total += (root / entry["file"]).stat().st_size
+            except OSError:
+                pass
+        removed = []
+        for publish, entry in sorted(entries.items(), key=lambda i: i[1]["last_used"]):
+            if total <= max_size:
+                break
+            local_dirpath = (root / entry["file"]).parent
+            if Path(publish).parent in _mapped:
+                # Referenced in the open scene
+                continue
+            shutil.rmtree(local_dirpath, ignore_errors=True)
+            if local_dirpath.exists():
+                continue
+            total -= entry["size"]
+            removed.append(publish)
+        for publish in removed:
+            del entries[publish]
+        return removed
+
+    return _update_index(remove_oldest, root)
+
+
+def _work():
+    while True:
+        publish_path = _queue.get()
+        try:
+            if cached_copy(publish_path) is None:
+                cache_publish(publish_path)
+        except (OSError, TimeoutError) as error:
+            print(f"Could not cache the reference '{publish_path.name}': {error}")
+        finally:
+            with _pending_lock:
+                _pending.discard(publish_path)
+            _queue.task_done()
+
+
+def prefetch(publish_paths: list):
+    """Copy publishes to the cache on the background worker, the up to date ones are skipped.
+
+    Does nothing unless the 'reference_cache' setting is on.
+    """
+    if not cache_enabled():
+        return
+    global _worker
+    with _pending_lock:
+        for publish_path in publish_paths:
+            publish_path = Path(publish_path)
+            if publish_path in _pending or not publish_path.exists():
+                continue
+            _pending.add(publish_path)
+            _queue.put(publish_path)
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name="UliPipeReferenceCache", daemon=True)
+            _worker.start()
+
+
+def resolve_scene_references(scene_path: Path):
+    """Resolve the references of a scene before it is opened, see resolve.
+
+    The references are read from the file without Maya.
+
+    Returns:
+        int: Number of references read from the cache.
+    """
+    from .dependencies import COPY_NUMBER, scene_references
+
+    resolved = 0
+    for reference in scene_references(scene_path):
+        publish_path = Path(COPY_NUMBER.sub("", reference))
+        if publish_path.exists() and resolve(publish_path) is not None:
+            resolved += 1
+    return resolved
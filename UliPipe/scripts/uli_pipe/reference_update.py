@@ -0,0 +1,156 @@
+import os
+from pathlib import Path
+
+from maya import cmds
+
+from .reference_cache import cache_enabled, resolve
+from .trace import trace_phase, traced
+
+# Kept by uli_pipe.reload_module, the files were loaded before the reload
+_KEEP_ON_RELOAD = ("_loaded", "_callback")
+# {reference node: (unresolved path, mtime_ns, size)} of the file each reference loaded
+_loaded = {}
+_callback = None
+
+
+def _file_states(paths: list):
+    # Date and size of many files, each folder is listed once instead of a stat per file
+    states = {}
+    by_dirpath = {}
+    for path in paths:
+        by_dirpath.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+    for dirpath, names in by_dirpath.items():
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.name in names:
+                        stat = entry.stat()
+                        states[os.path.join(dirpath, entry.name)] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            continue
+    return states
+
+
+def _reference_path(reference_node: str):
+    # Path as written in the scene, the share even when read from the reference cache
+    path = cmds.referenceQuery(reference_node, filename=True, unresolvedName=True, withoutCopyNumber=True)
+    return os.path.normpath(cmds.workspace(expandName=path))
+
+
+def record_loaded(reference_nodes: list = None):
+    """Remember the date and size of the files references loaded.
+
+    Called by the reference callback, only needed for references loaded before it was installed.
+
+    Args:
+        reference_nodes (list): Loaded reference nodes, all of them when None.
+    """
+    if reference_nodes is None:
+        reference_nodes = loaded_references()
+    paths = {node: _reference_path(node) for node in reference_nodes}
+    states = _file_states(list(paths.values()))
+    for node, path in paths.items():
+        if path in states:
+            _loaded[node] = (path, *states[path])
+
+
+def _on_reference_loaded(reference_node, file_object, client_data=None):
+    import maya.api.OpenMaya as om
+
+    try:
+        record_loaded([om.MFnDependencyNode(reference_node).name()])
+    except RuntimeError:
+        # Reference node without a file
+        pass
+
+
+def install_callback():
+    """Record the files references load from now on, such as when a scene is opened."""
+    global _callback
+    if _callback is not None:
+        return
+    import maya.api.OpenMaya as om
+
+    _callback = om.MSceneMessage.addReferenceCallback(
+        om.MSceneMessage.kAfterLoadReference, _on_reference_loaded
+    )
+
+
+def loaded_references():
+    """List the loaded reference nodes of the scene, nested ones included."""
+    nodes = []
+    for node in cmds.ls(type="reference"):
+        if node == "sharedReferenceNode" or node.endswith("_UNKNOWN_REF_NODE_"):
+            continue
+        try:
+            if cmds.referenceQuery(node, isLoaded=True):
+                nodes.append(node)
+        except RuntimeError:
+            continue
+    return nodes
+
+
+@traced
+def outdated_references():
+    """List the loaded references whose file changed on disk since it was loaded.
+
+    All the files are checked in one pass over their folders, nothing is read from them.
+    References loaded before the callback was installed are considered up to date, from
+    the moment of their first check.
+
+    Returns:
+        list: Reference nodes, parents before the references they hold.
+    """
+    reference_nodes = loaded_references()
+    paths = {node: _reference_path(node) for node in reference_nodes}
+    with trace_phase("scan", files=len(paths)):
+        states = _file_states(list(paths.values()))
+
+    outdated = []
+    for node, path in paths.items():
+        state = states.get(path)
+        if state is None:
+            # Moved or deleted, reloading would fail
+            continue
+        loaded = _loaded.get(node)
+        if loaded is None or loaded[0] != path:
+            _loaded[node] = (path, *state)
+        elif loaded[1:] != state:
+            outdated.append(node)
+    return sorted(outdated, key=_depth)
+
+
+def _depth(reference_node: str):
+    depth = 0
+    while reference_node:
+        reference_node = cmds.referenceQuery(reference_node, parent=True, referenceNode=True)
+        depth += 1
+    return depth
+
+
+@traced
+def update_references():
+    """Reload the outdated references in place, keeping their reference edits.
+
+    The references that are up to date are not touched, nor the ones inside a
+    reloaded reference, which come back with it.
+
+    Returns:
+        list: The reloaded reference nodes.
+    """
+    reloaded = []
+    for node in outdated_references():
+        parent = cmds.referenceQuery(node, parent=True, referenceNode=True)
+        while parent and parent not in reloaded:
+            parent = cmds.referenceQuery(parent, parent=True, referenceNode=True)
+        if parent:
+            continue
+        # Drop an outdated cached copy, the share is read until a new copy is fetched
+        if cache_enabled():
+            resolve(Path(_loaded[node][0]))
+        with trace_phase("maya_io", action="reload"):
+            cmds.file(loadReference=node)
+        reloaded.append(node)
+    # The references inside the reloaded ones loaded again too
+    record_loaded()
+    return reloaded
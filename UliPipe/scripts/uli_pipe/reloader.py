@@ -0,0 +1,168 @@
+import ast
+import importlib
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_PATH = Path(__file__).parent
+# Modules keep the values of the names they list in _KEEP_ON_RELOAD, such as
+# the queue of a background worker that keeps running
+KEEP_ON_RELOAD = "_KEEP_ON_RELOAD"
+_KEEP_ON_RELOAD = ("_mtimes", "_last_reload", "_imports")
+
+_mtimes = {}
+_last_reload = None
+_imports = {}
+
+
+def tracked_modules():
+    """Return the loaded modules whose source is in the UliPipe folder, vendor included.
+
+    Returns:
+        dict: {module name: source path}
+    """
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        source = getattr(module, "__file__", None)
+        if source is None or not source.endswith(".py"):
+            continue
+        source = Path(source)
+        if source.is_relative_to(PACKAGE_PATH):
+            modules[name] = source
+    return modules
+
+
+def _module_imports(name: str, source: Path, names: set):
+    # Names of the tracked modules imported by a module, wherever the import is
+    mtime = source.stat().st_mtime_ns
+    cached = _imports.get(name)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    module = sys.modules[name]
+    package = module.__package__ or name.rpartition(".")[0]
+    tree = ast.parse(source.read_bytes(), filename=source.as_posix())
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            try:
+                base = importlib.util.resolve_name("." * node.level + (node.module or ""), package)
+            except (ImportError, ValueError):
+                continue
+            imports.add(base)
+            # 'from package import module' imports a submodule
+            imports.update(f"{base}.{alias.name}" for alias in node.names)
+    imports = (imports & names) - {name}
+    _imports[name] = (mtime, imports)
+    return imports
+
+
+def changed_modules(modules: dict = None):
+    """List the tracked modules whose source changed since they were loaded or last reloaded."""
+    modules = modules if modules is not None else tracked_modules()
+    # Before the first reload, any source newer than the package is considered changed
+    baseline = _last_reload or getattr(sys.modules.get(__package__), "_LOADED_AT", time.time())
+    changed = []
+    for name, source in modules.items():
+        try:
+            mtime = source.stat().st_mtime_ns
+        except OSError:
+            continue
+        if name in _mtimes:
+            if _mtimes[name] != mtime:
+                changed.append(name)
+        elif mtime > baseline * 1e9:
+            changed.append(name)
+    return sorted(changed)
+
+
+def reload_order(changed: list, modules: dict = None):
+    """Sort the changed modules and the modules importing them, directly or not.
+
+    A module comes after the modules it imports, so its 'from x import y' get the new code.
+    """
+    modules = modules if modules is not None else tracked_modules()
+    names = set(modules)
+    imports = {name: _module_imports(name, source, names) for name, source in modules.items()}
+
+    dependents = {name: set() for name in names}
+    for name, imported in imports.items():
+        for imported_name in imported:
+            dependents[imported_name].add(name)
+    to_reload = set()
+    pending = list(changed)
+    while pending:
+        name = pending.pop()
+        if name not in to_reload:
+            to_reload.add(name)
+            pending.extend(dependents.get(name, ()))
+
+    # Kahn's algorithm restricted to the modules to reload
+    remaining = {name: imports[name] & to_reload for name in to_reload}
+    order = []
+    while remaining:
+        ready = sorted(name for name, imported in remaining.items() if not imported)
+        if not ready:
+            # Import cycle, reload the rest in name order
+            ready = sorted(remaining)
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+        for imported in remaining.values():
+            imported.difference_update(ready)
+    return order
+
+
+def _update_widgets(reloaded: dict):
+    # Open windows switch to the new version of their class, so they run the new code
+    qt_widgets = sys.modules.get("uli_pipe.vendor.Qt.QtWidgets")
+    application = qt_widgets.QApplication.instance() if qt_widgets else None
+    if application is None:
+        return
+    for widget in application.allWidgets():
+        module = reloaded.get(type(widget).__module__)
+        new_class = getattr(module, type(widget).__name__, None)
+        if new_class is None or new_class is type(widget):
+            continue
+        try:
+            widget.__class__ = new_class
+        except TypeError as error:
+            print(f"Could not update the open '{type(widget).__name__}': {error}")
+
+
+def reload_changed():
+    """Reload the UliPipe modules whose source changed, and the modules importing them.
+
+    Unchanged modules, the vendored ones included, are left as they are. Open
+    windows keep running and use the new code of their class.
+
+    Returns:
+        list: Names of the reloaded modules, in reload order.
+    """
+    global _last_reload
+    modules = tracked_modules()
+    order = reload_order(changed_modules(modules), modules)
+    reloaded = {}
+    for name in order:
+        module = sys.modules[name]
+        keep = {i: module.__dict__[i] for i in module.__dict__.get(KEEP_ON_RELOAD, ()) if i in module.__dict__}
+        try:
+            importlib.reload(module)
+        except Exception as error:
+            print(f"Could not reload module '{name}': {type(error).__name__}: {error}")
+            continue
+        module.__dict__.update(keep)
+        reloaded[name] = module
+        print(f"Reloaded module: {name}")
+    _update_widgets(reloaded)
+
+    _last_reload = time.time()
+    for name, source in tracked_modules().items():
+        try:
+            _mtimes[name] = source.stat().st_mtime_ns
+        except OSError:
+            pass
+    return order
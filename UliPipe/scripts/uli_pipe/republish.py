@@ -0,0 +1,261 @@
+"""Republish many assets from their latest edit, in a pool of mayapy processes.
+
+Can be run from any Python: python -m uli_pipe.republish <project> [--types prop] [--departments modeling]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .archive import display_name, resolve_version, version_names
+
+JOURNAL_PATH = Path.home() / ".ulipipe" / "republish.jsonl"
+RESULT_PREFIX = "ULIPIPE_RESULT "
+SCRIPTS_PATH = Path(__file__).parent.parent
+VENDOR_PATH = Path(__file__).parent / "vendor"
+DEFAULT_CAMERAS = {"|front", "|persp", "|side", "|top"}
+
+
+def latest_edits(project_path: Path, asset_types=None, assets=None, departments=None):
+    """Find the latest edit of each asset and department.
+
+    Args:
+        project_path (Path): Root folder of the project.
+        asset_types (list): Only these asset types, all of them when None.
+        assets (list): Only the assets with these names, all of them when None.
+        departments (list): Only these departments, all of them when None.
+
+    Returns:
+        list: Paths of the edits, compressed ones included, sorted.
+    """
+    edits = []
+    for asset_type_path in sorted((project_path / "04_asset").iterdir()):
+        if not asset_type_path.is_dir() or (asset_types and asset_type_path.name not in asset_types):
+            continue
+        for asset_path in sorted(asset_type_path.iterdir()):
+            if not asset_path.is_dir() or (assets and asset_path.name not in assets):
+                continue
+            edit_path = asset_path / "maya" / "scenes" / "edit"
+            if not edit_path.exists():
+                continue
+            for department_path in sorted(edit_path.iterdir()):
+                if not department_path.is_dir() or (departments and department_path.name not in departments):
+                    continue
+                versions = []
+                for name in version_names(department_path):
+                    try:
+                        versions.append((int(Path(name).stem.split("_E_")[1]), name))
+                    except (IndexError, ValueError):
+                        continue
+                if versions:
+                    edits.append(resolve_version(department_path, max(versions)[1]))
+    return edits
+
+
+def read_journal(journal_path: Path):
+    """Read a republish journal.
+
+    Returns:
+        dict: {edit path: last result}, the results of a run are appended as they come.
+    """
+    results = {}
+    try:
+        with open(journal_path, "r") as file:
+            for line in file:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # Last line of an interrupted run
+                    continue
+                results[result["edit"]] = result
+    except OSError:
+        pass
+    return results
+
+
+class _Worker:
+    # A mayapy process publishing the edits it reads from its standard input, one per line
+
+    def __init__(self, mayapy: Path):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            i for i in (SCRIPTS_PATH.as_posix(), VENDOR_PATH.as_posix(), env.get("PYTHONPATH")) if i
+        )
+        self.process = subprocess.Popen(
+            [mayapy.as_posix(), "-m", "uli_pipe.republish", "--serve"],
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+
+    def publish(self, edit: Path, project_path: Path):
+        job = {"edit": edit.as_posix(), "project": project_path.as_posix()}
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        # Maya writes its own messages to the output too
+        for line in self.process.stdout:
+            if line.startswith(RESULT_PREFIX):
+                return json.loads(line[len(RESULT_PREFIX) :])
+        raise RuntimeError(f"mayapy stopped with the code {self.process.wait()}")
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+
+def republish(
+    project_path: Path,
+    edits: list,
+    workers: int = 4,
+    mayapy: Path = None,
+    journal_path: Path = JOURNAL_PATH,
+    resume: bool = True,
+):
+    """Publish edits again in a pool of mayapy processes, as PUB would.
+
+    Each result is appended to the journal as soon as it is known, a run started again
+    with resume skips the edits published since their last change.
+
+    Args:
+        project_path (Path): Root folder of the project.
+        edits (list): Paths of the edits, see latest_edits.
+        workers (int): Number of mayapy processes. Default value is 4.
+        mayapy (Path): Path of mayapy, the one of MAYA_LOCATION when None, see validate.mayapy_path.
+        journal_path (Path): Path of the journal. Default is ~/.ulipipe/republish.jsonl.
+        resume (bool): Skip the edits the journal records as published. Default value is True.
+
+    Returns:
+        list: The results of this run, one dict per edit.
+    """
+    if mayapy is None:
+        from .validate import mayapy_path
+
+        mayapy = mayapy_path()
+    journal = read_journal(journal_path) if resume else {}
+    pending = []
+    for edit in edits:
+        done = journal.get(edit.as_posix())
+        if done and done["status"] == "done" and done["mtime"] == edit.stat().st_mtime:
+            continue
+        pending.append(edit)
+    print(f"Republishing {len(pending)} edits, {len(edits) - len(pending)} already done")
+
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+    journal_lock = threading.Lock()
+    local = threading.local()
+    pool = []
+    results = []
+
+    def run(edit: Path):
+        # Each thread drives its own mayapy, started again if it crashed
+        worker = getattr(local, "worker", None)
+        if worker is None or worker.process.poll() is not None:
+            worker = local.worker = _Worker(mayapy)
+            with journal_lock:
+                pool.append(worker)
+        start = time.perf_counter()
+        try:
+            result = worker.publish(edit, project_path)
+        except (OSError, RuntimeError, ValueError) as error:
+            result = {"edit": edit.as_posix(), "status": "failed", "error": str(error)}
+        result["mtime"] = edit.stat().st_mtime
+        result["duration"] = round(time.perf_counter() - start, 3)
+        with journal_lock:
+            with open(journal_path, "a") as file:
+                file.write(json.dumps(result) + "\n")
+            results.append(result)
+            print(f"[{len(results)}/{len(pending)}] {result['status']}: {edit.name} {result.get('error', '')}")
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run, pending))
+    finally:
+        for worker in pool:
+            worker.close()
+    return results
+
+
+def publish_edit(edit: Path, project_path: Path):
+    """Open an edit in this mayapy and publish its top level nodes."""
+    from maya import cmds
+
+    from .archive import decompress_to_temp, is_compressed
+    from .save_file import publish_scene
+
+    # Compressed edits are opened from a local copy, the publish still comes from the edit
+    scene = decompress_to_temp(edit) if is_compressed(edit) else edit
+    edit = edit.with_name(display_name(edit.name))
+    cmds.file(scene.as_posix(), open=True, force=True)
+    nodes = [i for i in cmds.ls(assemblies=True, long=True) if i not in DEFAULT_CAMERAS]
+    if not nodes:
+        raise ValueError("The edit has nothing to publish")
+    cmds.select(nodes, replace=True)
+    return publish_scene(edit, project_path, staged=False, validate=False)
+
+
+def serve():
+    """Publish the edits read from the standard input, for the pool of republish."""
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+    try:
+        for line in sys.stdin:
+            job = json.loads(line)
+            edit = Path(job["edit"])
+            result = {"edit": edit.as_posix()}
+            try:
+                result["publish"] = publish_edit(edit, Path(job["project"])).as_posix()
+                result["status"] = "done"
+            except Exception as error:
+                result["status"] = "failed"
+                result["error"] = f"{type(error).__name__}: {error}"
+            sys.stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+            sys.stdout.flush()
+    finally:
+        maya.standalone.uninitialize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Republish the latest edit of many assets")
+    parser.add_argument("project", type=Path, nargs="?", help="Root folder of the project")
+    parser.add_argument("--types", nargs="+", help="Only these asset types")
+    parser.add_argument("--assets", nargs="+", help="Only these assets")
+    parser.add_argument("--departments", nargs="+", help="Only these departments")
+    parser.add_argument("--workers", type=int, default=4, help="Number of mayapy processes")
+    parser.add_argument("--mayapy", type=Path, default=os.environ.get("MAYAPY"), help="Path of mayapy")
+    parser.add_argument("--journal", type=Path, default=JOURNAL_PATH, help="Progress journal")
+    parser.add_argument("--restart", action="store_true", help="Ignore the journal of a previous run")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        return
+    if args.project is None:
+        parser.error("the project is required")
+    if args.mayapy is None:
+        from .validate import mayapy_path
+
+        try:
+            args.mayapy = mayapy_path()
+        except FileNotFoundError as error:
+            parser.error(f"{error}, or give --mayapy (or the MAYAPY variable)")
+    edits = latest_edits(args.project, args.types, args.assets, args.departments)
+    results = republish(args.project, edits, args.workers, args.mayapy, args.journal, not args.restart)
+    sys.exit(1 if any(i["status"] != "done" for i in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
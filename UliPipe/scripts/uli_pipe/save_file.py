@@ -1,15 +1,37 @@
 # Order convention for imports: Python base libraries, third-party libraries, your own libraries
+import os
+import time
 from pathlib import Path
 
+import maya.utils
 from maya import cmds, mel
 
+from uli_pipe import catalog
+from uli_pipe.archive import resolve_version, schedule_compression
+from uli_pipe.filelock import release, reserve
+from uli_pipe.manifest import record_version, rename_version
 from uli_pipe.open import maya_main_window
 from uli_pipe.project_path import get_project_path
+from uli_pipe.proxy import PROXY_DIRNAME, export_proxy, proxy_path
+from uli_pipe.settings import get_setting
+from uli_pipe.trace import annotate_file, trace_phase, traced
+from uli_pipe.transfer import (
+    TransferRefused,
+    is_pending,
+    resume_transfers,
+    schedule_transfer,
+    staged_destination,
+    staging_enabled,
+    staging_path,
+)
+from uli_pipe.validate import schedule_validation
 from uli_pipe.vendor.Qt import QtWidgets
 
 PUBLISH_EXTENSION = ".mb"
+THUMBNAILS_DIRNAME = ".thumbnails"
 
 
+@traced
 def save_edit():
     # Get the path to the project
     project_path = get_project_path()
@@ -21,7 +43,9 @@ def save_edit():
             "The current Maya scene is not in any file, please save the file, before saving an increment"
         )
     else:
+        # A staged save keeps its local path until it lands, its version is the one of the project
         current_file = Path(current_file)
+        current_file = staged_destination(current_file) or current_file
 
     # Check if the current file is located inside the current project
     if current_file.is_relative_to(project_path) is False:
@@ -41,13 +65,46 @@ def save_edit():
 
     # Recreate the path
     new_path = current_file.parent / (new_name + scene_extension)
-    # Raise an error if the maya scene is not the latest increment
-    if new_path.exists() is True:
+    # Reserve the new version, only one artist can save it even at the same moment
+    if not reserve(new_path):
+        raise RuntimeError(f"The version '{new_number}' is being saved from another session")
+    # Raise an error if the maya scene is not the latest increment, compressed, staged or not
+    if resolve_version(new_path.parent, new_path.name) is not None or is_pending(new_path):
+        release(new_path)
         raise RuntimeError("The current Maya scene is not the highest increment")
 
-    # Save the file with the new name
-    cmds.file(rename=new_path)
-    cmds.file(save=True, force=True)
+    # Save the file with the new name, on the local disk first if the artist opted in
+    staged = staging_enabled()
+    save_path = staging_path(new_path) if staged else new_path
+    if staged:
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with trace_phase("maya_io", action="save"):
+            cmds.file(rename=save_path)
+            cmds.file(save=True, force=True)
+    except RuntimeError:
+        release(new_path)
+        raise
+    annotate_file(save_path)
+    try:
+        thumbnail = _save_thumbnail(new_path)
+    except (RuntimeError, OSError) as error:
+        # The version is saved, it only goes without a thumbnail
+        cmds.warning(f"Could not save the thumbnail of '{new_path.name}': {error}")
+        thumbnail = None
+    info = {
+        "version": int(new_number),
+        "source": current_file.name,
+        "thumbnail": thumbnail.as_posix() if thumbnail else None,
+        "project": project_path.as_posix(),
+    }
+
+    if staged:
+        # The scene stays on the local file until it lands, a save meanwhile goes there too
+        info["staged_path"] = save_path.as_posix()
+        schedule_transfer(save_path, new_path, finalize=install_edit, on_done=_finish_save, info=info)
+    else:
+        _finish_save(new_path, info=info)
 
     cmds.inViewMessage(
         message=f"<hl>Versioned up to version '{new_number}'</hl>",
@@ -59,9 +116,11 @@ def save_edit():
     )
 
 
+@traced
 def save_publish():
     msg = "Have you run the cleanup & sanity before publishing? ;)"
-    confirmation = QtWidgets.QMessageBox.question(maya_main_window(), "Publish Confirmation", msg)
+    with trace_phase("ui"):
+        confirmation = QtWidgets.QMessageBox.question(maya_main_window(), "Publish Confirmation", msg)
     if confirmation != QtWidgets.QMessageBox.Yes:
         return
 
@@ -77,14 +136,29 @@ def save_publish():
 
     # Check if the current file is located inside the current project
     current_file = Path(current_file)
+    current_file = staged_destination(current_file) or current_file
     if current_file.is_relative_to(project_path) is False:
         # IF not, raise an error
         raise RuntimeError(
             "The current Maya file is not located within the current project, please set the correct project"
         )
 
+    publish_scene(current_file, project_path, staged=staging_enabled())
+
+    msg = "<hl>Model published as a Maya file</hl>"
+    cmds.inViewMessage(
+        statusMessage=msg,
+        position="midCenter",
+        fade=True,
+        dragKill=True,
+        clickKill=True,
+    )
+
+
+def publish_path_of(edit_path: Path):
+    """Return the publish path of an edit, such as '.../publish/modeling/chair_modeling_P.mb'."""
     # Create the publish path corresponding to the current file
-    publish_path_parts = list(current_file.parent.parts)
+    publish_path_parts = list(edit_path.parent.parts)
     if "edit" in publish_path_parts:
         edit_index = publish_path_parts.index("edit")
         publish_path_parts[edit_index] = "publish"
@@ -93,7 +167,7 @@ def save_publish():
         raise ValueError("The current Maya file is not in a pipeline with edit/publish folders")
 
     # Create the publish name
-    current_scene_name = current_file.stem
+    current_scene_name = edit_path.stem
     name_parts = current_scene_name.split("_E_")
     if len(name_parts) != 2:
         raise NameError("The file name doesn't follow the format: 'name'_E_'number'")
@@ -106,38 +180,233 @@ def save_publish():
     # Check if the file name ends in _P
     if not publish_path.stem.endswith("_P"):
         raise NameError("The given file name is wrong, should end with '_P' as it is a publish")
+    return publish_path
+
+
+def publish_scene(edit_path: Path, project_path: Path, staged: bool = False, validate: bool = True):
+    """Export the selection of the open scene as the publish of an edit.
+
+    The previous publish is moved to the backup folder. The export is written under a
+    temporary name and installed with install_publish, so artists publishing the same
+    asset at the same time each get their publish backed up instead of overwritten.
+
+    Args:
+        edit_path (Path): Edit the open scene comes from.
+        project_path (Path): Root folder of the project.
+        staged (bool): Export to the local disk and copy to the project in the background.
+        validate (bool): Run the 'publish_checks' on the new publish. Default value is True.
+
+    Returns:
+        Path: Path of the publish.
+    """
+    publish_path = publish_path_of(edit_path)
+
+    # Export the file, on the local disk first if the artist opted in
+    if staged:
+        export_path = staging_path(publish_path)
+        export_path.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        # Hidden until installed, versions lists leave it out
+        export_path = publish_path.with_name(f".{publish_path.stem}.{os.getpid()}-{time.time_ns()}{publish_path.suffix}")  # fmt: skip
+    with trace_phase("export"):
+        _export_maya_selection_from_maya(export_path=export_path, anim_data=False)
+    annotate_file(export_path)
+    info = {
+        "version": int(edit_path.stem.split("_E_")[1]),
+        "source": edit_path.name,
+        "project": project_path.as_posix(),
+        "validate": validate,
+    }
+
+    if staged:
+        # The previous publish is backed up when the new one lands, transfers run in order
+        schedule_transfer(export_path, publish_path, finalize=install_publish, on_done=_finish_save, info=info)
+    else:
+        install_publish(export_path, publish_path)
+        _finish_save(publish_path, info=info)
+
+    # Light gpuCache version of the publish, referenced instead of it in proxy mode
+    if get_setting("publish_proxy"):
+        nodes = cmds.ls(selection=True, long=True)
+        final_dirpath = proxy_path(publish_path).parent
+        export_dirpath = staging_path(proxy_path(publish_path)).parent if staged else None
+        with trace_phase("export", kind="proxy"):
+            proxy_paths = export_proxy(nodes, publish_path, export_dirpath=export_dirpath)
+        if staged:
+            # Queued after the publish, the proxy lands last and stays newer than it
+            final_dirpath.mkdir(exist_ok=True)
+            for path in proxy_paths:
+                schedule_transfer(path, final_dirpath / path.name, on_done=_finish_save)
+    return publish_path
+
+
+def install_publish(export_path: Path, publish_path: Path):
+    """Give a new publish its final name, the current one going to the backup folder first.
+
+    The new publish is hard linked to its name, which fails if another publish took
+    the name meanwhile: that one is backed up in turn and the link tried again. No lock
+    is held, concurrent publishers only retry when they actually collide.
+    """
+    while True:
+        try:
+            os.link(export_path, publish_path)
+        except FileExistsError:
+            backup_publish(publish_path)
+            continue
+        except OSError:
+            # File systems without hard links
+            backup_publish(publish_path)
+            os.replace(export_path, publish_path)
+            return
+        os.unlink(export_path)
+        return
 
-    # Check if there is already a file at the given path
-    if publish_path.exists():
-        # Create the backup folder
-        backup_path = publish_path.parent / "backup"
-        if not backup_path.exists():
-            backup_path.mkdir()
-
-        new_name = publish_path.stem
-        extension = publish_path.suffix
-        # Query all the publish backups version numbers
-        file_numbers = [int(file.stem.split("_P_")[-1]) for file in backup_path.iterdir() if file.is_file()]  # fmt:skip
-        if len(file_numbers) == 0:
-            publish_version_name = f"{new_name}_001" + extension
-        else:
-            # Pick the highest number, add 1, modify the publish name
-            publish_version_name = f"{new_name}_{str(max(file_numbers) + 1).zfill(3)}" + extension
 
+def backup_publish(publish_path: Path):
+    """Move the current publish, if any, to the backup folder under the next backup number.
+
+    The backup number is reserved by creating the backup file with O_CREAT | O_EXCL, then
+    the publish is moved over it. A number taken by a concurrent publisher is skipped.
+
+    Returns:
+        bool: True if a publish was backed up, False if there was none.
+    """
+    if not publish_path.exists():
+        return False
+    # Create the backup folder
+    backup_path = publish_path.parent / "backup"
+    backup_path.mkdir(exist_ok=True)
+
+    new_name = publish_path.stem
+    extension = publish_path.suffix
+    # Query all the publish backups version numbers
+    with trace_phase("scan", directory=backup_path.as_posix()):
+        file_numbers = []
+        for file in backup_path.iterdir():
+            try:
+                file_numbers.append(int(file.stem.split("_P_")[-1]))
+            except ValueError:
+                continue
+    # Pick the highest number, add 1, and the next ones if they get taken meanwhile
+    number = max(file_numbers, default=0) + 1
+    while True:
+        publish_version_name = f"{new_name}_{str(number).zfill(3)}" + extension
         destination = backup_path / publish_version_name
-        publish_path.rename(destination)
+        try:
+            os.close(os.open(destination, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            number += 1
 
-    # Export the file
-    _export_maya_selection_from_maya(export_path=publish_path, anim_data=False)
+    try:
+        # Replaces the reserved empty file in one step
+        os.replace(publish_path, destination)
+    except FileNotFoundError:
+        # Backed up by a concurrent publisher first
+        destination.unlink()
+        return False
+    rename_version(publish_path.parent, publish_path.name, f"backup/{publish_version_name}")
+    return True
 
-    msg = "<hl>Model published as a Maya file</hl>"
-    cmds.inViewMessage(
-        statusMessage=msg,
-        position="midCenter",
-        fade=True,
-        dragKill=True,
-        clickKill=True,
+
+def install_edit(part_path: Path, edit_path: Path):
+    """Give a staged edit its final name, never over a newer file saved in the project.
+
+    Raises:
+        TransferRefused: A file newer than the staged edit has its name, both are kept.
+    """
+    try:
+        os.link(part_path, edit_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        # File systems without hard links
+        if not edit_path.exists():
+            os.replace(part_path, edit_path)
+            return
+    else:
+        os.unlink(part_path)
+        return
+    # The copy keeps the date of the staged file
+    if edit_path.stat().st_mtime > part_path.stat().st_mtime:
+        raise TransferRefused(f"'{edit_path.name}' was saved in the project after the staged save")
+    os.replace(part_path, edit_path)
+
+
+def _finish_save(path: Path, error: Exception = None, info: dict = None):
+    # Record a new edit or publish once it is in the project, called from the transfer worker when staged
+    if error is not None:
+        if isinstance(error, TransferRefused):
+            # The project has a file under that name already, the version is not reserved anymore
+            release(path)
+            staged_path = info.get("staged_path") if info else None
+            message = f"{error}, the staged save is kept at '{staged_path or 'the staging folder'}'"
+        else:
+            message = f"'{path.name}' could not be copied to the project, it will be retried in the next session"
+        maya.utils.executeDeferred(cmds.warning, message)
+        return
+    # The new version is in the project, its reservation is not needed anymore
+    release(path)
+    if info is not None and info.get("staged_path"):
+        # Qt and Maya scene calls only from the main thread
+        maya.utils.executeDeferred(_rename_open_scene, Path(info["staged_path"]), path)
+    if info is None:
+        # Proxies are not versions
+        return
+    thumbnail = Path(info["thumbnail"]) if info.get("thumbnail") else None
+    # Record the new version for the version browser
+    record_version(path, version=info["version"], source=info["source"], thumbnail=thumbnail)
+    catalog.record_version(path, version=info["version"], project_path=Path(info["project"]))
+    if path.stem.endswith("_P"):
+        if not info.get("validate", True):
+            return
+        # Qt objects can only be created from the main thread
+        maya.utils.executeDeferred(schedule_validation, path)
+    else:
+        # Compress the older versions in the background if the artist opted in
+        schedule_compression(path.parent)
+
+
+def _rename_open_scene(staged_path: Path, path: Path):
+    # Point the open scene to the project once its staged save landed, unless another scene was opened
+    scene_name = cmds.file(query=True, sceneName=True)
+    if scene_name and Path(scene_name) == staged_path:
+        cmds.file(rename=path)
+
+
+def resume_staged_saves():
+    """Transfer the edits and publishes a previous session left on the local disk."""
+
+    def finalize(part_path, path):
+        if path.stem.endswith("_P") and path.parent.name != PROXY_DIRNAME:
+            install_publish(part_path, path)
+        elif "_E_" in path.stem:
+            install_edit(part_path, path)
+        else:
+            os.replace(part_path, path)
+
+    return resume_transfers(finalize=finalize, on_done=_finish_save)
+
+
+def _save_thumbnail(scene_path: Path):
+    # Playblast the current frame next to the versions, only if the artist opted in
+    if not get_setting("version_thumbnails"):
+        return None
+    thumbnail_path = scene_path.parent / THUMBNAILS_DIRNAME / f"{scene_path.stem}.jpg"
+    thumbnail_path.parent.mkdir(exist_ok=True)
+    current_frame = cmds.currentTime(query=True)
+    cmds.playblast(
+        completeFilename=thumbnail_path.as_posix(),
+        format="image",
+        compression="jpg",
+        frame=[current_frame],
+        widthHeight=(256, 256),
+        percent=100,
+        showOrnaments=False,
+        viewer=False,
+        forceOverwrite=True,
     )
+    return thumbnail_path
 
 
 def _export_maya_file_from_maya(export_path: Path, anim_data: bool = False):
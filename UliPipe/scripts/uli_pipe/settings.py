@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+SETTINGS_PATH = Path.home() / ".ulipipe" / "settings.json"
+
+DEFAULT_SETTINGS = {
+    "trace": False,
+    "compress_edits_keep": 0,
+    "version_thumbnails": False,
+    "catalog": False,
+    "publish_checks": [],
+    "local_staging": False,
+    "staging_path": "",
+    "reference_cache": False,
+    "reference_cache_size_gb": 20,
+    "reference_cache_path": "",
+    "publish_proxy": False,
+    "proxy_references": False,
+}
+
+_settings = None
+
+
+def load_settings():
+    """Read the user settings from disk, filling the missing keys with the defaults.
+
+    Returns:
+        dict: The user settings.
+    """
+    global _settings
+    settings = dict(DEFAULT_SETTINGS)
+    if SETTINGS_PATH.exists():
+        try:
+            with open(SETTINGS_PATH, "r") as file:
+                settings.update(json.load(file))
+        except (OSError, ValueError):
+            print(f"Could not read the UliPipe settings at '{SETTINGS_PATH}', using the defaults")
+    _settings = settings
+    return settings
+
+
+def get_setting(key: str):
+    """Get a user setting, the settings file is only read once per session.
+
+    Args:
+        key (str): Name of the setting.
+    """
+    if _settings is None:
+        load_settings()
+    return _settings.get(key, DEFAULT_SETTINGS.get(key))
+
+
+def set_setting(key: str, value):
+    """Set a user setting and save it in the settings file.
+
+    Args:
+        key (str): Name of the setting.
+        value: Any JSON serializable value.
+    """
+    if _settings is None:
+        load_settings()
+    _settings[key] = value
+
+    # check if the path to .ulipipe exists, else create it
+    if SETTINGS_PATH.parent.exists() is False:
+        SETTINGS_PATH.parent.mkdir()
+    with open(SETTINGS_PATH, "w") as file:
+        json.dump(_settings, file, indent=4)
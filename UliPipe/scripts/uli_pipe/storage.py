@@ -0,0 +1,281 @@
+"""Disk usage of a project, per asset, shot, department and kind of file, without Maya.
+
+Can be run from any Python: python -m uli_pipe.storage <project> [--top 20]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .archive import _version_number, is_compressed
+from .filelock import FileLock
+
+CACHE_NAME = ".ulipipe_storage.json"
+LOCK_NAME = ".ulipipe_storage.lock"
+PROJECT_ROOTS = ("04_asset", "05_shot")
+TEMPLATE_PREFIX = "_template"
+SCENE_SUFFIXES = (".ma", ".mb")
+BACKUP_NUMBER = re.compile(r"_P_(\d+)\.\w+$")
+# Copies interrupted before they took their final name, after a day they are left behind
+STALE_PART_AGE = 24 * 3600
+
+# Kinds of files, from the layout of the project
+EDIT = "edit"
+EDIT_COMPRESSED = "edit_compressed"
+PUBLISH = "publish"
+BACKUP = "backup"
+PROXY = "proxy"
+THUMBNAIL = "thumbnail"
+CHECK_HISTORY = "check_history"
+ZBRUSH_INPUT = "zbrush_input"
+ZBRUSH_OUTPUT = "zbrush_output"
+TEMPLATE = "template"
+PIPELINE = "pipeline"
+PARTIAL = "partial"
+OTHER = "other"
+
+
+def _locate(parts: tuple):
+    # Entity, department and kind of the files of a folder, from its parts below the project
+    if len(parts) < 2:
+        return None, None, OTHER
+    if parts[1].startswith(TEMPLATE_PREFIX):
+        return f"{parts[0]}/{parts[1]}", None, TEMPLATE
+    if len(parts) < 3:
+        return None, None, OTHER
+    entity = f"{parts[0]}/{parts[1]}/{parts[2]}"
+    rest = parts[3:]
+    if ".thumbnails" in rest:
+        kind = THUMBNAIL
+    elif ".modelChecker" in rest:
+        kind = CHECK_HISTORY
+    else:
+        kind = OTHER
+
+    if rest[:2] == ("sculpt", "zbrush") and len(rest) > 2:
+        return entity, "sculpt", {"input": ZBRUSH_INPUT, "output": ZBRUSH_OUTPUT}.get(rest[2], OTHER)
+    if rest[:2] != ("maya", "scenes") or len(rest) < 4:
+        return entity, None, kind
+    # Assets are split by stage then department, shots by department then stage
+    if parts[0] == "04_asset":
+        stage, department = rest[2], rest[3]
+    else:
+        department, stage = rest[2], rest[3]
+    if kind == OTHER:
+        if stage == "edit":
+            kind = EDIT
+        elif stage == "publish":
+            kind = {"backup": BACKUP, "proxy": PROXY}.get(rest[4] if len(rest) > 4 else None, PUBLISH)
+    return entity, department, kind
+
+
+def _scan_directory(dirpath: str, parts: tuple, keep_edits: int, keep_backups: int):
+    # Totals and reclaimable files of one folder, and its subfolders
+    entity, department, kind = _locate(parts)
+    usage = {}
+    subdirs = []
+    files = []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                files.append((entry.name, stat.st_size, stat.st_mtime))
+
+    reclaimable = []
+    edits = []
+    backups = []
+    for name, size, mtime in files:
+        if name.endswith(".part"):
+            file_kind = PARTIAL
+            if time.time() - mtime > STALE_PART_AGE:
+                reclaimable.append([name, size, "interrupted copy"])
+        elif name.startswith(".") and kind != TEMPLATE:
+            file_kind = PIPELINE
+        elif kind == EDIT and is_compressed(Path(name)):
+            file_kind = EDIT_COMPRESSED
+        else:
+            file_kind = kind
+        count, total = usage.get(file_kind, (0, 0))
+        usage[file_kind] = (count + 1, total + size)
+
+        if file_kind == EDIT and name.endswith(SCENE_SUFFIXES):
+            number = _version_number(name)
+            if number is not None:
+                edits.append((number, name, size))
+        elif file_kind == BACKUP:
+            match = BACKUP_NUMBER.search(name)
+            if match:
+                backups.append((int(match.group(1)), name, size))
+
+    # The newest versions stay, the older ones can go or be compressed
+    if keep_edits:
+        for _, name, size in sorted(edits)[:-keep_edits]:
+            reclaimable.append([name, size, "uncompressed old edit"])
+    if keep_backups:
+        for _, name, size in sorted(backups)[:-keep_backups]:
+            reclaimable.append([name, size, "old publish backup"])
+    return {
+        "entity": entity,
+        "department": department,
+        "usage": {i: list(j) for i, j in usage.items()},
+        "reclaimable": reclaimable,
+        "dirs": sorted(subdirs),
+    }
+
+
+def read_cache(project_path: Path):
+    """Read the folders scanned by the last update, see update_usage."""
+    try:
+        with open(project_path / CACHE_NAME, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(project_path: Path, cache: dict):
+    # Write next to the cache then swap, readers never see a partial file
+    part_path = project_path / (CACHE_NAME + ".part")
+    with open(part_path, "w") as file:
+        json.dump(cache, file)
+    os.replace(part_path, project_path / CACHE_NAME)
+
+
+def update_usage(project_path: Path = None, workers: int = 32, keep_edits: int = 5, keep_backups: int = 3):
+    """Scan the assets and shots of a project, reusing the folders unchanged since the last scan.
+
+    Folders are listed in parallel. A folder whose date did not change since the last
+    scan is not listed again, only its subfolders are checked; a file rewritten in
+    place does not change the date of its folder, '--full' scans everything again.
+
+    Args:
+        project_path (Path): Root folder of the project, the current project when None.
+        workers (int): Number of folders listed at the same time. Default value is 32.
+        keep_edits (int): Latest edits per department not counted as reclaimable. Default value is 5.
+        keep_backups (int): Latest backups per publish not counted as reclaimable. Default value is 3.
+
+    Returns:
+        dict: {folder relative to the project: scan}, each scan holding the entity,
+            department, usage ({kind: [files, bytes]}), reclaimable files and subfolders.
+    """
+    if project_path is None:
+        from .project_path import get_project_path
+
+        project_path = get_project_path()
+    project_path = Path(project_path)
+    rules = {"keep_edits": keep_edits, "keep_backups": keep_backups}
+    cache = read_cache(project_path)
+    cached = cache.get("dirs", {}) if cache.get("rules") == rules else {}
+    scanned = {}
+
+    def scan(relative: str):
+        dirpath = os.path.join(project_path, relative)
+        mtime = os.stat(dirpath).st_mtime_ns
+        entry = cached.get(relative)
+        if entry is None or entry["mtime"] != mtime:
+            entry = _scan_directory(dirpath, tuple(relative.split("/")), keep_edits, keep_backups)
+            entry["mtime"] = mtime
+        return relative, entry
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(scan, i) for i in PROJECT_ROOTS if (project_path / i).is_dir()}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    relative, entry = future.result()
+                except OSError as error:
+                    # Deleted or unreadable while scanning
+                    print(f"Could not scan a folder: {error}")
+                    continue
+                scanned[relative] = entry
+                pending |= {executor.submit(scan, f"{relative}/{i}") for i in entry["dirs"]}
+
+    # Deleted folders are dropped by not being carried over
+    if scanned != cached:
+        with FileLock(project_path / LOCK_NAME, timeout=60.0, stale=600.0):
+            _write_cache(project_path, {"rules": rules, "dirs": scanned})
+    return scanned
+
+
+def summarize(scanned: dict):
+    """Add up the scanned folders.
+
+    Returns:
+        dict: {"total", "kinds", "entities", "departments", "reclaimable"}, bytes per kind,
+            per entity, per (entity, department) and the reclaimable files, largest first,
+            as (path, bytes, reason).
+    """
+    summary = {"total": 0, "kinds": {}, "entities": {}, "departments": {}, "reclaimable": []}
+    for relative, entry in scanned.items():
+        for kind, (_, size) in entry["usage"].items():
+            summary["total"] += size
+            summary["kinds"][kind] = summary["kinds"].get(kind, 0) + size
+            if entry["entity"] is not None:
+                summary["entities"][entry["entity"]] = summary["entities"].get(entry["entity"], 0) + size
+            if entry["department"] is not None:
+                key = (entry["entity"], entry["department"])
+                summary["departments"][key] = summary["departments"].get(key, 0) + size
+        for name, size, reason in entry["reclaimable"]:
+            summary["reclaimable"].append((f"{relative}/{name}", size, reason))
+    summary["reclaimable"].sort(key=lambda i: -i[1])
+    return summary
+
+
+def _size(size: int):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show where the disk space of a UliPipe project goes")
+    parser.add_argument("project", type=Path, help="Root folder of the project")
+    parser.add_argument("--top", type=int, default=20, help="Number of lines per table")
+    parser.add_argument("--keep-edits", type=int, default=5, help="Latest edits not counted as reclaimable")
+    parser.add_argument("--keep-backups", type=int, default=3, help="Latest backups not counted as reclaimable")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--full", action="store_true", help="Ignore the result of the last scan")
+    parser.add_argument("--json", type=Path, help="Also write the scanned folders to this file")
+    args = parser.parse_args()
+
+    if args.full:
+        (args.project / CACHE_NAME).unlink(missing_ok=True)
+    start = time.perf_counter()
+    scanned = update_usage(args.project, args.workers, args.keep_edits, args.keep_backups)
+    summary = summarize(scanned)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(scanned, file, indent=1)
+
+    print(f"{_size(summary['total'])} in {len(scanned)} folders, scanned in {time.perf_counter() - start:.1f}s")
+    tables = (
+        ("Kind", summary["kinds"].items()),
+        ("Asset or shot", summary["entities"].items()),
+        ("Department", ((f"{i[0]} {i[1]}", j) for i, j in summary["departments"].items())),
+    )
+    for title, rows in tables:
+        print(f"\n{title}")
+        for name, size in sorted(rows, key=lambda i: -i[1])[: args.top]:
+            print(f"  {_size(size):>10}  {name}")
+
+    reclaimable = summary["reclaimable"]
+    print(f"\nReclaimable: {_size(sum(i[1] for i in reclaimable))} in {len(reclaimable)} files")
+    by_reason = {}
+    for _, size, reason in reclaimable:
+        by_reason[reason] = by_reason.get(reason, 0) + size
+    for reason, size in sorted(by_reason.items(), key=lambda i: -i[1]):
+        print(f"  {_size(size):>10}  {reason}")
+    for path, size, reason in reclaimable[: args.top]:
+        print(f"  {_size(size):>10}  {path} ({reason})")
+
+
+if __name__ == "__main__":
+    main()
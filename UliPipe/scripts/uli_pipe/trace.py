@@ -0,0 +1,200 @@
+import functools
+import getpass
+import json
+import os
+import platform
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .settings import get_setting, set_setting
+
+TRACE_LOG_PATH = Path.home() / ".ulipipe" / "operations.jsonl"
+
+_enabled = bool(get_setting("trace"))
+_local = threading.local()
+_write_lock = threading.Lock()
+# Kept by uli_pipe.reload_module, the running operations go on
+_KEEP_ON_RELOAD = ("_local", "_write_lock")
+
+
+def tracing_enabled():
+    return _enabled
+
+
+def set_tracing(enabled: bool, persist: bool = True):
+    """Turn the operation log on or off.
+
+    Args:
+        enabled (bool): Whether the timings should be recorded.
+        persist (bool): Save the choice in the user settings. Default value is True.
+    """
+    global _enabled
+    _enabled = bool(enabled)
+    if persist:
+        set_setting("trace", _enabled)
+
+
+class _NullSpan:
+    # Shared span returned while tracing is disabled, does nothing at all
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def annotate(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "fields", "phases", "start", "timestamp")
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+        self.phases = []
+
+    def __enter__(self):
+        _stack().append(self)
+        self.timestamp = datetime.now().isoformat(timespec="milliseconds")
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+
+        record = {"phase": self.name, "duration": round(duration, 6)}
+        record.update(self.fields)
+        if exc_type is not None:
+            record["status"] = "error"
+            record["error"] = f"{exc_type.__name__}: {exc_value}"
+        if self.phases:
+            record["phases"] = self.phases
+
+        # Nested spans are phases of their parent, only the outermost one is logged
+        if stack:
+            stack[-1].phases.append(record)
+        else:
+            del record["phase"]
+            record = {
+                "operation": self.name,
+                "timestamp": self.timestamp,
+                "status": "ok",
+                "user": getpass.getuser(),
+                "host": platform.node(),
+                "pid": os.getpid(),
+                **record,
+            }
+            _write_record(record)
+        return False
+
+    def annotate(self, **fields):
+        self.fields.update(fields)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _write_record(record: dict):
+    # The log must never break the pipeline, errors are only reported
+    try:
+        line = json.dumps(record, default=str)
+        with _write_lock:
+            if TRACE_LOG_PATH.parent.exists() is False:
+                TRACE_LOG_PATH.parent.mkdir()
+            with open(TRACE_LOG_PATH, "a") as file:
+                file.write(line + "\n")
+    except (OSError, TypeError, ValueError) as error:
+        print(f"Could not write the UliPipe operation log: {error}")
+
+
+def log_operation(name: str, duration: float, phases: list = None, status: str = "ok", **fields):
+    """Log an operation timed by the caller, such as work spread over several event loop iterations.
+
+    Args:
+        name (str): Name of the operation.
+        duration (float): Wall time of the operation in seconds.
+        phases (list): Records of its phases, dicts with at least "phase" and "duration".
+        status (str): "ok", "error" or "cancelled". Default value is "ok".
+        **fields: Extra JSON serializable values stored with the timing.
+    """
+    if not _enabled:
+        return
+    record = {
+        "operation": name,
+        "timestamp": datetime.fromtimestamp(time.time() - duration).isoformat(timespec="milliseconds"),
+        "status": status,
+        "user": getpass.getuser(),
+        "host": platform.node(),
+        "pid": os.getpid(),
+        "duration": round(duration, 6),
+        **fields,
+    }
+    if phases:
+        record["phases"] = phases
+    _write_record(record)
+
+
+def trace_phase(name: str, **fields):
+    """Context manager timing a phase of the current operation.
+
+    Used outside of a traced operation, the phase is logged as its own operation.
+
+    Args:
+        name (str): Name of the phase, such as "scan", "maya_io", "export" or "ui".
+        **fields: Extra JSON serializable values stored with the timing.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+def traced(func):
+    """Decorator logging the wall time of a pipeline entry point and of its phases."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Span(func.__name__, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def annotate(**fields):
+    """Add values to the innermost running phase or operation."""
+    if not _enabled:
+        return
+    stack = _stack()
+    if stack:
+        stack[-1].fields.update(fields)
+
+
+def annotate_file(path: Path, key: str = "scene"):
+    """Record a file path and its size in the innermost running phase or operation.
+
+    The file is only stat'ed when tracing is enabled.
+
+    Args:
+        path (Path): Path of the file.
+        key (str): Name under which the path is stored. Default value is "scene".
+    """
+    if not _enabled:
+        return
+    try:
+        size = Path(path).stat().st_size
+    except OSError:
+        size = None
+    annotate(**{key: Path(path).as_posix(), f"{key}_size": size})
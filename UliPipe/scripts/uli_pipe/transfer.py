@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .settings import get_setting
+
+STAGING_PATH = Path(tempfile.gettempdir()) / "ulipipe_staging"
+JOB_SUFFIX = ".transfer.json"
+MAX_ATTEMPTS = 4
+CHUNK_SIZE = 4 * 1024 * 1024
+# Seconds Maya waits for the transfers left when it quits
+EXIT_TIMEOUT = 300.0
+
+# Kept by uli_pipe.reload_module, the background work goes on
+_KEEP_ON_RELOAD = ("_queue", "_pending", "_pending_lock", "_worker", "_exit_callback")
+_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_worker = None
+_exit_callback = None
+
+
+def staging_enabled():
+    return bool(get_setting("local_staging"))
+
+
+def staging_path(project_file: Path):
+    """Return a new local path to write a project file to before transferring it.
+
+    Each call gives a new folder, so a publish saved again before the previous one was
+    transferred does not overwrite it.
+    """
+    staging_root = Path(get_setting("staging_path") or STAGING_PATH)
+    project_file = Path(project_file)
+    return staging_root / Path(*project_file.parent.parts[1:]) / str(time.time_ns()) / project_file.name
+
+
+def is_pending(project_file: Path):
+    """Whether a file is waiting to be transferred to the project, or being transferred."""
+    with _pending_lock:
+        return Path(project_file) in _pending
+
+
+def file_checksum(path: Path):
+    checksum = hashlib.blake2b()
+    with open(path, "rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def copy_verified(source: Path, destination: Path):
+    """Copy a file next to its destination, then check the copy against the source.
+
+    Returns:
+        Path: Path of the verified copy, a '.part' file next to the destination.
+    """
+    # Named after this session, publishers of the same file do not write over each other
+    part_path = destination.with_name(f"{destination.name}.{os.getpid()}-{time.time_ns()}.part")
+    checksum = hashlib.blake2b()
+    with open(source, "rb") as source_file, open(part_path, "wb") as part_file:
+        while chunk := source_file.read(CHUNK_SIZE):
+            checksum.update(chunk)
+            part_file.write(chunk)
+        part_file.flush()
+        os.fsync(part_file.fileno())
+    shutil.copystat(source, part_path)
+    # Read the copy back from the share, so a bad write does not go unnoticed
+    if file_checksum(part_path) != checksum.hexdigest():
+        part_path.unlink()
+        raise OSError(f"The copy of '{source.name}' does not match the local file")
+    return part_path
+
+
+class TransferRefused(Exception):
+    """Raised by a finalize callback to keep the staged file instead of writing over the destination."""
+
+
+def _file_state(path: Path):
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _transfer(local_path: Path, destination: Path, finalize=None, on_done=None, info=None):
+    while True:
+        state = _file_state(local_path)
+        error = None
+        for attempt in range(MAX_ATTEMPTS):
+            part_path = None
+            try:
+                part_path = copy_verified(local_path, destination)
+                (finalize or os.replace)(part_path, destination)
+                error = None
+                break
+            except Exception as exception:
+                error = exception
+                print(f"Could not transfer '{local_path.name}' (attempt {attempt + 1}): {exception}")
+                # A copy that did not take its final name is not left in the project
+                if part_path is not None:
+                    try:
+                        part_path.unlink(missing_ok=True)
+                    except OSError:
+                        pass
+                # Only the errors of the disk or network are worth another attempt
+                if not isinstance(exception, OSError):
+                    break
+                if attempt + 1 < MAX_ATTEMPTS:
+                    time.sleep(2**attempt)
+        if error is not None:
+            # The staged file and its job are kept, resume_transfers will try again
+            print(f"Gave up transferring '{local_path.name}', it is still at '{local_path}'")
+            if on_done is not None:
+                on_done(destination, error, info)
+            return
+        # Saved again while it was copied, the newer save is copied too
+        if _file_state(local_path) == state:
+            break
+
+    local_path.unlink()
+    _job_path(local_path).unlink(missing_ok=True)
+    # Files staged together, the last one transferred removes the folder
+    if not any(local_path.parent.iterdir()):
+        local_path.parent.rmdir()
+    if on_done is not None:
+        on_done(destination, None, info)
+
+
+def _job_path(local_path: Path):
+    return local_path.with_name(local_path.name + JOB_SUFFIX)
+
+
+def staged_destination(local_path: Path):
+    """Return the project path of a staged file, None if the file is not waiting for a transfer."""
+    try:
+        with open(_job_path(Path(local_path)), "r") as file:
+            return Path(json.load(file)["destination"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _work():
+    while True:
+        local_path, destination, finalize, on_done, info = _queue.get()
+        try:
+            _transfer(local_path, destination, finalize, on_done, info)
+        except Exception as error:
+            print(f"Could not transfer '{local_path.name}': {error}")
+        finally:
+            with _pending_lock:
+                _pending.discard(destination)
+            _queue.task_done()
+
+
+def schedule_transfer(
+    local_path: Path, destination: Path, finalize=None, on_done=None, info: dict = None
+):
+    """Copy a staged file to the project on the background worker.
+
+    Transfers run one at a time in the order they were scheduled. The copy is
+    checksummed, retried on failure and only renamed to its final name once complete.
+
+    Args:
+        local_path (Path): Staged file, removed once transferred.
+        destination (Path): Path of the file in the project.
+        finalize (callable): Gives the verified copy its final name, called with the
+            copy and the destination, such as to back up the previous publish first.
+            Default is os.replace.
+        on_done (callable): Called from the worker thread with the destination, the
+            error, None on success, and the info.
+        info (dict): JSON serializable data kept with the staged file and given back
+            to on_done, also when the transfer is resumed in another session.
+    """
+    global _worker
+    local_path = Path(local_path)
+    destination = Path(destination)
+    # Keep the destination with the staged file, in case Maya closes before the transfer
+    with open(_job_path(local_path), "w") as file:
+        json.dump({"destination": destination.as_posix(), "info": info}, file)
+    with _pending_lock:
+        _pending.add(destination)
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name="UliPipeTransfer", daemon=True)
+            _worker.start()
+    _queue.put((local_path, destination, finalize, on_done, info))
+
+
+def resume_transfers(finalize=None, on_done=None):
+    """Schedule the staged files left behind by a previous session.
+
+    Returns:
+        list: Destinations of the resumed transfers.
+    """
+    staging_root = Path(get_setting("staging_path") or STAGING_PATH)
+    if not staging_root.exists():
+        return []
+    resumed = []
+    for job_path in sorted(staging_root.rglob(f"*{JOB_SUFFIX}"), key=lambda i: i.stat().st_mtime):
+        local_path = job_path.with_name(job_path.name[: -len(JOB_SUFFIX)])
+        try:
+            with open(job_path, "r") as file:
+                job = json.load(file)
+            destination = Path(job["destination"])
+        except (OSError, ValueError, KeyError):
+            continue
+        if not local_path.exists() or is_pending(destination):
+            continue
+        schedule_transfer(local_path, destination, finalize, on_done, job.get("info"))
+        resumed.append(destination)
+    return resumed
+
+
+def wait_for_transfers(timeout: float = None):
+    """Block until every scheduled transfer is done.
+
+    Args:
+        timeout (float): Seconds to wait at most, no limit when None.
+
+    Returns:
+        bool: True if every transfer is done, the ones left are resumed at the next start.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _queue.all_tasks_done:
+        while _queue.unfinished_tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            _queue.all_tasks_done.wait(remaining)
+    return True
+
+
+def _on_maya_exiting(client_data=None):
+    if not _queue.unfinished_tasks:
+        return
+    print(f"Waiting for {_queue.unfinished_tasks} files to be copied to the project...")
+    if not wait_for_transfers(EXIT_TIMEOUT):
+        print("The files left will be copied to the project at the next start")
+
+
+def install_exit_callback():
+    """Let the scheduled transfers finish before Maya quits, up to EXIT_TIMEOUT seconds."""
+    global _exit_callback
+    if _exit_callback is not None:
+        return
+    import maya.api.OpenMaya as om
+
+    _exit_callback = om.MSceneMessage.addCallback(om.MSceneMessage.kMayaExiting, _on_maya_exiting)
@@ -0,0 +1,261 @@
+import argparse
+import getpass
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .settings import get_setting
+
+VALIDATION_SUFFIX = ".validation.json"
+SCRIPTS_PATH = Path(__file__).parent.parent
+VENDOR_PATH = Path(__file__).parent / "vendor"
+IGNORED_NODES = {"|front", "|persp", "|top", "|side"}
+# Failing components listed per check in the report, the count is always complete
+MAX_REPORTED_ERRORS = 20
+
+# Kept by uli_pipe.reload_module, the background work goes on
+_KEEP_ON_RELOAD = ("_running", "_timer")
+_running = []
+_timer = None
+
+
+def validation_path(publish_path: Path):
+    """Return the path of the validation result of a publish, a hidden file next to it."""
+    return publish_path.with_name(f".{publish_path.name}{VALIDATION_SUFFIX}")
+
+
+def read_validation(publish_path: Path):
+    """Read the validation result of a publish.
+
+    Returns:
+        dict: The result, None if the publish was not validated.
+    """
+    try:
+        with open(validation_path(publish_path), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def mayapy_path():
+    """Return the path of the mayapy of the running Maya, in the bin folder of MAYA_LOCATION.
+
+    Raises:
+        FileNotFoundError: MAYA_LOCATION is not set or has no mayapy.
+    """
+    maya_location = os.environ.get("MAYA_LOCATION")
+    if not maya_location:
+        raise FileNotFoundError("Could not find mayapy, the MAYA_LOCATION variable is not set")
+    mayapy = Path(maya_location) / "bin" / ("mayapy.exe" if os.name == "nt" else "mayapy")
+    if not mayapy.is_file():
+        raise FileNotFoundError(f"Could not find mayapy at '{mayapy}', check the MAYA_LOCATION variable")
+    return mayapy
+
+
+def schedule_validation(publish_path: Path):
+    """Validate a publish in a background mayapy, the artist is notified when it is done.
+
+    Does nothing unless the 'publish_checks' setting lists modelChecker checks.
+
+    Returns:
+        subprocess.Popen: The validation process, None if none was started.
+    """
+    checks = get_setting("publish_checks")
+    if not checks:
+        return None
+    try:
+        mayapy = mayapy_path()
+    except FileNotFoundError as error:
+        print(f"Could not validate the publish: {error}")
+        return None
+
+    # Remove the result of the previous publish, it does not apply anymore
+    try:
+        validation_path(publish_path).unlink()
+    except FileNotFoundError:
+        pass
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        i for i in (SCRIPTS_PATH.as_posix(), VENDOR_PATH.as_posix(), env.get("PYTHONPATH")) if i
+    )
+    process = subprocess.Popen(
+        [mayapy.as_posix(), "-m", "uli_pipe.validate", publish_path.as_posix(), *checks],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    _running.append((process, publish_path))
+    _watch()
+    return process
+
+
+def _watch():
+    # Poll the running validations from the Maya event loop
+    global _timer
+    from uli_pipe.vendor.Qt import QtCore
+
+    if _timer is None:
+        _timer = QtCore.QTimer()
+        _timer.setInterval(1000)
+        _timer.timeout.connect(_poll)
+    if not _timer.isActive():
+        _timer.start()
+
+
+def _poll():
+    for process, publish_path in list(_running):
+        if process.poll() is None:
+            continue
+        _running.remove((process, publish_path))
+        notify(publish_path)
+    if not _running:
+        _timer.stop()
+
+
+def _report(result: dict):
+    # Text report of a validation result, one line per check
+    lines = []
+    if result.get("error"):
+        lines.append(f"The validation could not run: {result['error']}")
+    for check, check_result in result.get("checks", {}).items():
+        # Issues compared with the previous publish, when it was validated too
+        changes = f" ({check_result['new']} new, {check_result['fixed']} fixed)" if "new" in check_result else ""
+        if check_result["passed"]:
+            lines.append(f"{check}: passed{changes}")
+            continue
+        lines.append(f"{check}: {check_result['errors']} issue(s){changes}")
+        lines.extend(f"    {i}" for i in check_result["components"])
+    return "\n".join(lines)
+
+
+def notify(publish_path: Path):
+    """Tell the artist how the validation of a publish went, without blocking Maya."""
+    from maya import cmds
+
+    from uli_pipe.open import maya_main_window
+    from uli_pipe.vendor.Qt import QtCore, QtWidgets
+
+    result = read_validation(publish_path)
+    if result is None:
+        result = {"passed": False, "error": "the validation process ended without a result"}
+    status = "passed" if result["passed"] else "FAILED"
+    color = "#64a65a" if result["passed"] else "#9c4f4f"
+    cmds.inViewMessage(
+        message=f"<hl>Publish validation <font color={color}>{status}</font>: {publish_path.name}</hl>",
+        position="topCenter",
+        fade=True,
+        fadeStayTime=4000,
+        clickKill=True,
+        dragKill=True,
+    )
+    if result["passed"]:
+        return
+
+    message_box = QtWidgets.QMessageBox(maya_main_window())
+    message_box.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+    message_box.setIcon(QtWidgets.QMessageBox.Warning)
+    message_box.setWindowTitle("Publish Validation")
+    message_box.setText(f"The publish '{publish_path.name}' did not pass the checks")
+    message_box.setDetailedText(_report(result))
+    message_box.setModal(False)
+    message_box.show()
+
+
+def _write_result(publish_path: Path, result: dict):
+    # Written next to the publish then swapped, readers never see a partial file
+    path = validation_path(publish_path)
+    part_path = path.with_name(path.name + ".part")
+    with open(part_path, "w") as file:
+        json.dump(result, file, indent=4)
+    os.replace(part_path, path)
+
+
+def _record_history(publish_path: Path, diagnostics: dict, nodes: list):
+    # Keep the check results with the publish, as arrays the next publish is compared to
+    try:
+        import modelChecker.modelChecker_history as mch
+    except ImportError:
+        # NumPy is not installed for this mayapy
+        return {}
+    path = mch.historyPath(publish_path.as_posix())
+    previous = mch.readResults(path)
+    current = mch.packDiagnostics(diagnostics, nodes)
+    # A new publish replaces the results of the previous one
+    mch.writeResults(path, current)
+    return {
+        check: {"new": mch.countIssues(diff["new"]), "fixed": mch.countIssues(diff["fixed"])}
+        for check, diff in mch.diffResults(previous, current).items()
+    }
+
+
+def validate(publish_path: Path, checks: list):
+    """Open a publish in this mayapy and run modelChecker checks on it.
+
+    The result is written next to the publish, see read_validation.
+    """
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+    from maya import cmds
+
+    import modelChecker.modelChecker_commands as mcc
+
+    start = time.perf_counter()
+    result = {
+        "publish": publish_path.name,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "user": getpass.getuser(),
+        "passed": False,
+        "checks": {},
+    }
+    try:
+        cmds.file(publish_path.as_posix(), open=True, force=True)
+        nodes = [
+            cmds.ls(node, uuid=True)[0]
+            for node in cmds.ls(transforms=True, long=True)
+            if node not in IGNORED_NODES
+        ]
+        diagnostics = mcc.runCommands(checks, nodes)
+        changes = _record_history(publish_path, diagnostics, nodes)
+        for check, diagnostic in diagnostics.items():
+            if diagnostic["type"] == "nodes":
+                components = [cmds.ls(uuid)[0] for uuid in diagnostic["uuids"] if cmds.ls(uuid)]
+            else:
+                components = []
+                for uuid, ids in diagnostic["uuids"].items():
+                    node_name = cmds.ls(uuid)
+                    components += [f"{node_name[0] if node_name else uuid} {diagnostic['type']} {i}" for i in ids]  # fmt: skip
+            result["checks"][check] = {
+                "passed": not components,
+                "errors": len(components),
+                "components": components[:MAX_REPORTED_ERRORS],
+            }
+            # Compared with the previous publish
+            result["checks"][check].update(changes.get(check, {}))
+        result["passed"] = all(i["passed"] for i in result["checks"].values())
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    finally:
+        result["duration"] = round(time.perf_counter() - start, 3)
+        _write_result(publish_path, result)
+        maya.standalone.uninitialize()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a UliPipe publish with the modelChecker")
+    parser.add_argument("publish", type=Path, help="Path of the publish to open")
+    parser.add_argument("checks", nargs="+", help="Names of the modelChecker checks to run")
+    args = parser.parse_args()
+    result = validate(args.publish, args.checks)
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
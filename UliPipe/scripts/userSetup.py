@@ -19,7 +19,33 @@ def load_uli_shelf():
     maya.mel.eval(f'loadNewShelf "{shelf_path.as_posix()}";')
 
 
+def resume_transfers():
+    # Copy to the project the saves a previous session left on the local disk
+    from uli_pipe.save_file import resume_staged_saves
+
+    resume_staged_saves()
+
+
+def install_exit_callback():
+    # Let the files being copied to the project finish before Maya quits
+    from uli_pipe.transfer import install_exit_callback
+
+    install_exit_callback()
+
+
+def install_reference_callback():
+    # Remember what each reference loaded, to find the outdated ones later
+    from uli_pipe.reference_update import install_callback
+
+    install_callback()
+
+
+# Also in batch mode, a script saving with local staging would lose its last transfers
+maya.utils.executeDeferred(install_exit_callback)
+
 # If Maya not in batch mode
 if cmds.about(batch=True) is False:
     load_uli_shelf()
+    maya.utils.executeDeferred(resume_transfers)
+    maya.utils.executeDeferred(install_reference_callback)
     # maya.utils.executeDeferred(load_shelf())
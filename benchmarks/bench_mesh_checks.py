@@ -0,0 +1,89 @@
+"""Time modelChecker mesh check implementations on synthetic meshes.
+
+Every implementation is a module exposing one function per check, taking a
+synthetic_meshes.MeshArrays and returning the failing component ids. The results
+are compared with the defects planted by the generator, so a faster engine is
+only accepted when it finds exactly the same components.
+
+Run from the repository root:
+
+    python benchmarks/bench_mesh_checks.py --faces 1000 100000 5000000
+    python benchmarks/bench_mesh_checks.py --impl reference_checks my_kernels --checks ngons poles
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, BENCH_DIR.as_posix())
+
+import synthetic_meshes  # noqa: E402
+
+
+def run_check(func, mesh, expected, repeat: int):
+    """Time a check and compare its result with the expected ids.
+
+    Returns:
+        dict: Best time in milliseconds and whether the result matched.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(mesh)
+        times.append(time.perf_counter() - start)
+    found = sorted(int(i) for i in result)
+    return {
+        "ms": min(times) * 1000,
+        "ok": found == expected,
+        "missing": len(set(expected) - set(found)),
+        "extra": len(set(found) - set(expected)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the modelChecker mesh checks")
+    parser.add_argument("--faces", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--impl", nargs="+", default=["reference_checks"], help="Modules to time")
+    parser.add_argument("--checks", nargs="+", default=list(synthetic_meshes.CHECKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    args = parser.parse_args()
+
+    implementations = {name: importlib.import_module(name) for name in args.impl}
+    results = {}
+    failed = False
+    for faces in args.faces:
+        start = time.perf_counter()
+        mesh, expected = synthetic_meshes.generate_mesh(faces)
+        print(
+            f"\n{mesh.numPolygons} faces, {mesh.numEdges} edges, {mesh.numVertices} vertices, "
+            f"{mesh.numUVs} UVs (generated in {time.perf_counter() - start:.1f}s)"
+        )
+        print(f"{'check':<20}" + "".join(f" {name:>23}" for name in implementations))
+        for check in args.checks:
+            line = f"{check:<20}"
+            for name, module in implementations.items():
+                func = getattr(module, check, None)
+                if func is None:
+                    line += f"{'-':>24}"
+                    continue
+                result = run_check(func, mesh, expected[check], args.repeat)
+                results.setdefault(name, {}).setdefault(str(faces), {})[check] = result
+                status = "ok" if result["ok"] else f"-{result['missing']}/+{result['extra']}"
+                line += f"{result['ms']:>14.2f} ms {status:>6}"
+                failed |= not result["ok"]
+            print(line)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=4))
+    if failed:
+        print("\nSome results differ from the planted defects (-missing/+extra)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
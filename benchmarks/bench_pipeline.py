@@ -0,0 +1,231 @@
+"""Benchmark the filesystem-heavy UliPipe paths on a synthetic project.
+
+Maya and Qt are replaced by the in-process stand-ins of fake_maya, so only the
+pipeline's own work (directory scans, version logic, copies) is measured.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --assets 10000 --shots 2000 --versions 200
+    python benchmarks/bench_pipeline.py --json bench.json --baseline previous.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+SCRIPTS_DIR = BENCH_DIR.parent / "UliPipe" / "scripts"
+sys.path.insert(0, BENCH_DIR.as_posix())
+sys.path.insert(0, SCRIPTS_DIR.as_posix())
+
+import fake_maya  # noqa: E402
+import synthetic_project  # noqa: E402
+
+
+_latest_versions = {}
+
+
+def _latest_version(edit_dirpath: Path):
+    # Listed once outside of the timings, then kept up to date by the save cases
+    if edit_dirpath not in _latest_versions:
+        _latest_versions[edit_dirpath] = sorted(i.name for i in edit_dirpath.iterdir())[-1]
+    return _latest_versions[edit_dirpath]
+
+
+def _measure(func, repeat: int):
+    times = []
+    for index in range(repeat):
+        start = time.perf_counter()
+        func(index)
+        times.append(time.perf_counter() - start)
+
+    # Separate pass for the allocations, tracemalloc slows everything down
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func(repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "min_ms": min(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "peak_kib": peak / 1024,
+        "blocks": blocks,
+    }
+
+
+def build_cases(project_path: Path, assets: list, shots: list):
+    """Return the benchmark cases as {name: callable(index)}."""
+    from uli_pipe import create, open, reference, save_file
+
+    asset_dirpath = project_path / "04_asset"
+    shot_dirpath = project_path / "05_shot"
+
+    def pick(items, index):
+        # Spread the runs over the whole tree instead of hitting the same directory
+        return items[(index * 7919) % len(items)]
+
+    def asset_edit_dirpath(asset_type, name):
+        return asset_dirpath / asset_type / name / "maya" / "scenes" / "edit" / "modeling"
+
+    def open_asset(index):
+        asset_type, name = pick(assets, index)
+        version_file = _latest_version(asset_edit_dirpath(asset_type, name))
+        open.open_asset(name, asset_type, "modeling", version_file, asset_dirpath)
+
+    def open_shot(index):
+        sequence, name = pick(shots, index)
+        edit_dirpath = shot_dirpath / sequence / name / "maya" / "scenes" / "anim" / "edit"
+        open.open_shot(name, "anim", shot_dirpath / sequence, _latest_version(edit_dirpath))
+
+    def reference_asset(index):
+        asset_type, name = pick(assets, index)
+        reference.reference_asset(name, asset_type, "modeling", asset_dirpath)
+
+    def save_edit(index):
+        asset_type, name = pick(assets, index)
+        edit_dirpath = asset_edit_dirpath(asset_type, name)
+        fake_maya.scene.scene_name = (edit_dirpath / _latest_version(edit_dirpath)).as_posix()
+        save_file.save_edit()
+        _latest_versions[edit_dirpath] = Path(fake_maya.scene.scene_name).name
+
+    def save_publish(index):
+        asset_type, name = pick(assets, index)
+        edit_dirpath = asset_edit_dirpath(asset_type, name)
+        fake_maya.scene.scene_name = (edit_dirpath / _latest_version(edit_dirpath)).as_posix()
+        save_file.save_publish()
+
+    def create_asset(index):
+        create.create_asset(f"bench{index:05d}_{time.monotonic_ns()}", "prop", asset_dirpath)
+
+    def create_shot(index):
+        create.create_shot(9000 + index % 999, time.monotonic_ns() % 9999 + 1, shot_dirpath)
+
+    open_asset_dialog = open.OpenAsset()
+    open_shot_dialog = open.OpenShot()
+    reference_dialog = reference.ReferenceAsset()
+
+    def assets_names(index):
+        open_asset_dialog.assets_names(open_asset_dialog.asset_browser.model.groups[index % 5])
+
+    def update_assets_versions(index):
+        # The fake Qt has no item model, the selection is set directly
+        open_asset_dialog.asset_browser.current_item = lambda: pick(assets, index)
+        open_asset_dialog.update_assets_versions()
+
+    def shots_names(index):
+        open_shot_dialog.shots_names(pick(shots, index)[0])
+
+    def index_shots(index):
+        # The search index is built on the first search of the dialog
+        open_shot_dialog.shot_browser.name_index = None
+        open_shot_dialog.shot_browser.filter_items("sh")
+
+    def search_shots(index):
+        open_shot_dialog.shot_browser.filter_items(f"sh{index % 10:03d}")
+
+    def update_shots_versions(index):
+        open_shot_dialog.shot_browser.current_item = lambda: pick(shots, index)
+        open_shot_dialog.update_shots_versions()
+
+    def reference_update_assets_names(index):
+        reference_dialog.update_assets_names()
+
+    return {
+        "open_asset": open_asset,
+        "open_shot": open_shot,
+        "reference_asset": reference_asset,
+        "save_edit": save_edit,
+        "save_publish": save_publish,
+        "create_asset": create_asset,
+        "create_shot": create_shot,
+        "OpenAsset.assets_names": assets_names,
+        "OpenAsset.update_assets_versions": update_assets_versions,
+        "OpenShot.shots_names": shots_names,
+        "OpenShot.index_shots": index_shots,
+        "OpenShot.search_shots": search_shots,
+        "OpenShot.update_shots_versions": update_shots_versions,
+        "ReferenceAsset.update_assets_names": reference_update_assets_names,
+    }
+
+
+def print_results(results: dict, baseline: dict = None, threshold: float = 1.2):
+    header = f"{'case':<36}{'runs':>6}{'min ms':>11}{'median ms':>11}{'peak KiB':>11}{'blocks':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        line = (
+            f"{name:<36}{result['runs']:>6}{result['min_ms']:>11.3f}{result['median_ms']:>11.3f}"
+            f"{result['peak_kib']:>11.1f}{result['blocks']:>9}"
+        )
+        if baseline and name in baseline:
+            ratio = result["median_ms"] / max(baseline[name]["median_ms"], 1e-9)
+            line += f"  x{ratio:.2f}"
+            if ratio > threshold:
+                line += "  REGRESSION"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark UliPipe on a synthetic project")
+    parser.add_argument("--root", type=Path, help="Reuse (or create) the project at this path")
+    parser.add_argument("--assets", type=int, default=1000)
+    parser.add_argument("--shots", type=int, default=200)
+    parser.add_argument("--versions", type=int, default=20)
+    parser.add_argument("--backups", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--filter", default="", help="Only run the cases containing this text")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="Compare with a previous --json output")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Ratio flagged as regression")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ulipipe_bench_"))
+    try:
+        # Isolate ~/.ulipipe so the artist settings and current project are left untouched
+        home = work_dir / "home"
+        (home / ".ulipipe").mkdir(parents=True)
+        os.environ["HOME"] = os.environ["USERPROFILE"] = home.as_posix()
+
+        project_path = args.root or work_dir / "project"
+        if not (project_path / "04_asset").exists():
+            start = time.perf_counter()
+            files = synthetic_project.generate_project(
+                project_path, args.assets, args.shots, args.versions, args.backups
+            )
+            print(f"Generated {files} files in {time.perf_counter() - start:.1f}s")
+        (home / ".ulipipe" / "current_project.txt").write_text(project_path.as_posix())
+
+        assets = [
+            (i.parent.name, i.name)
+            for i in sorted((project_path / "04_asset").glob("*/*"))
+            if not i.parent.name.startswith("_")
+        ]
+        shots = [(i.parent.name, i.name) for i in sorted((project_path / "05_shot").glob("sq*/sq*"))]
+
+        fake_maya.install()
+        cases = build_cases(project_path, assets, shots)
+
+        results = {}
+        for name, func in cases.items():
+            if args.filter in name:
+                results[name] = _measure(func, args.repeat)
+
+        baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+        print_results(results, baseline, args.threshold)
+        if args.json:
+            args.json.write_text(json.dumps(results, indent=4))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
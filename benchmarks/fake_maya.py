@@ -0,0 +1,319 @@
+"""In-process stand-in for the parts of Maya and Qt used by UliPipe.
+
+Only the calls made by the pipeline are implemented, with just enough behaviour
+for the filesystem logic to run: scenes are empty files, dialogs are never shown
+and every confirmation is accepted.
+"""
+
+import inspect
+import sys
+import types
+from pathlib import Path
+
+
+class FakeScene:
+    def __init__(self):
+        self.scene_name = ""
+        self.modified = False
+        self.references = []
+        self.selection = []
+        self.project = ""
+
+
+scene = FakeScene()
+
+
+def _write_scene(path):
+    Path(path).write_bytes(b"//Maya ASCII scene\n")
+
+
+def file(*args, **kwargs):
+    if kwargs.get("query") or kwargs.get("q"):
+        if kwargs.get("sceneName"):
+            return scene.scene_name
+        if kwargs.get("modified"):
+            return scene.modified
+        if kwargs.get("reference"):
+            return list(scene.references)
+        return None
+    if "rename" in kwargs:
+        scene.scene_name = Path(kwargs["rename"]).as_posix()
+        return scene.scene_name
+    if kwargs.get("save"):
+        _write_scene(scene.scene_name)
+        scene.modified = False
+        return scene.scene_name
+    if kwargs.get("open"):
+        scene.scene_name = Path(args[0]).as_posix()
+        scene.modified = False
+        scene.references = []
+        return scene.scene_name
+    if kwargs.get("reference"):
+        scene.references.append(Path(args[0]).as_posix())
+        return Path(args[0]).as_posix()
+    if kwargs.get("exportSelected") or kwargs.get("exportAll"):
+        _write_scene(args[0])
+        return args[0]
+    if kwargs.get("i") or kwargs.get("import"):
+        return args[0]
+    return None
+
+
+def inViewMessage(*args, **kwargs):
+    return None
+
+
+def confirmDialog(*args, **kwargs):
+    return "Don't Save"
+
+
+def warning(*args, **kwargs):
+    return None
+
+
+def select(*args, **kwargs):
+    scene.selection = list(args[0]) if args else []
+
+
+def ls(*args, **kwargs):
+    if kwargs.get("selection"):
+        return list(scene.selection)
+    return []
+
+
+def nodeType(*args, **kwargs):
+    return ["containerBase", "entity", "dagNode", "transform"] if kwargs.get("inherited") else "transform"
+
+
+def pluginInfo(*args, **kwargs):
+    return True
+
+
+def loadPlugin(*args, **kwargs):
+    return None
+
+
+def about(*args, **kwargs):
+    if kwargs.get("batch"):
+        return True
+    return None
+
+
+def optionVar(*args, **kwargs):
+    return None
+
+
+def mel_eval(command):
+    # maya.mel.eval, only 'setProject' and 'file' commands are sent by UliPipe
+    if command.startswith("setProject"):
+        scene.project = command.split('"')[1]
+    return None
+
+
+class _FakeSignal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        # Like Qt, the extra signal arguments are dropped for slots taking fewer
+        for slot in self.slots:
+            try:
+                parameters = inspect.signature(slot).parameters.values()
+            except (TypeError, ValueError):
+                slot(*args)
+                continue
+            if any(i.kind == i.VAR_POSITIONAL for i in parameters):
+                slot(*args)
+            else:
+                slot(*args[: len(parameters)])
+
+
+_SIGNAL_NAMES = {
+    "activated",
+    "clicked",
+    "currentChanged",
+    "currentIndexChanged",
+    "stateChanged",
+    "textChanged",
+    "timeout",
+}
+
+
+class _FakeQObject:
+    """Widget accepting any call, used for everything without behaviour."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name in _SIGNAL_NAMES:
+            signal = _FakeSignal()
+            setattr(self, name, signal)
+            return signal
+        return _noop
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class QComboBox(_FakeQObject):
+    def __init__(self, *args, **kwargs):
+        self.items = []
+        self.index = -1
+        self.currentIndexChanged = _FakeSignal()
+
+    def clear(self):
+        self.items = []
+        self.setCurrentIndex(-1)
+
+    def addItem(self, text, userData=None):
+        self.items.append(text)
+        if self.index == -1:
+            self.setCurrentIndex(0)
+
+    def addItems(self, texts):
+        empty = len(self.items) == 0
+        self.items.extend(texts)
+        if empty and self.items:
+            self.setCurrentIndex(0)
+
+    def count(self):
+        return len(self.items)
+
+    def currentText(self):
+        if 0 <= self.index < len(self.items):
+            return self.items[self.index]
+        return ""
+
+    def currentIndex(self):
+        return self.index
+
+    def setCurrentIndex(self, index):
+        if index != self.index:
+            self.index = index
+            self.currentIndexChanged.emit(index)
+
+    def setCurrentText(self, text):
+        if text in self.items:
+            self.setCurrentIndex(self.items.index(text))
+
+
+class QLineEdit(_FakeQObject):
+    def __init__(self, *args, **kwargs):
+        self._text = ""
+
+    def text(self):
+        return self._text
+
+    def setText(self, text):
+        self._text = text
+
+
+class QTreeView(_FakeQObject):
+    def __init__(self, *args, **kwargs):
+        self._selection_model = _FakeQObject()
+
+    def selectionModel(self):
+        return self._selection_model
+
+    def currentIndex(self):
+        # An invalid index, nothing is selected
+        return _FakeQObject()
+
+
+class QMessageBox(_FakeQObject):
+    Yes = 1
+    No = 0
+
+    @staticmethod
+    def question(*args, **kwargs):
+        return QMessageBox.Yes
+
+
+class QFileDialog(_FakeQObject):
+    @staticmethod
+    def getSaveFileName(*args, **kwargs):
+        return ("", "")
+
+    @staticmethod
+    def getOpenFileName(*args, **kwargs):
+        return ("", "")
+
+    @staticmethod
+    def getExistingDirectory(*args, **kwargs):
+        return ""
+
+
+class _FakeNamespace(types.ModuleType):
+    # Any missing Qt class or enum resolves to the generic fake object
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _FakeQObject
+
+
+def install():
+    """Register the fake maya, shiboken and Qt modules in sys.modules."""
+    maya = types.ModuleType("maya")
+    cmds = types.ModuleType("maya.cmds")
+    mel = types.ModuleType("maya.mel")
+    omui = types.ModuleType("maya.OpenMayaUI")
+    utils = types.ModuleType("maya.utils")
+
+    this = sys.modules[__name__]
+    for name in (
+        "file",
+        "inViewMessage",
+        "confirmDialog",
+        "warning",
+        "select",
+        "ls",
+        "nodeType",
+        "pluginInfo",
+        "loadPlugin",
+        "about",
+        "optionVar",
+    ):
+        setattr(cmds, name, getattr(this, name))
+    mel.eval = mel_eval
+    omui.MQtUtil = types.SimpleNamespace(mainWindow=lambda: 0)
+    utils.executeDeferred = lambda func, *args, **kwargs: func(*args, **kwargs)
+    maya.cmds, maya.mel, maya.OpenMayaUI, maya.utils = cmds, mel, omui, utils
+
+    shiboken = types.ModuleType("shiboken6")
+    shiboken.wrapInstance = lambda pointer, cls: None
+
+    qt = _FakeNamespace("uli_pipe.vendor.Qt")
+    qt_core = _FakeNamespace("uli_pipe.vendor.Qt.QtCore")
+    qt_core.Qt = _FakeQObject()
+    qt_gui = _FakeNamespace("uli_pipe.vendor.Qt.QtGui")
+    qt_widgets = _FakeNamespace("uli_pipe.vendor.Qt.QtWidgets")
+    qt_widgets.QDialog = _FakeQObject
+    qt_widgets.QWidget = _FakeQObject
+    qt_widgets.QComboBox = QComboBox
+    qt_widgets.QLineEdit = QLineEdit
+    qt_widgets.QTreeView = QTreeView
+    qt_widgets.QMessageBox = QMessageBox
+    qt_widgets.QFileDialog = QFileDialog
+    qt.QtCore, qt.QtGui, qt.QtWidgets = qt_core, qt_gui, qt_widgets
+
+    sys.modules.update(
+        {
+            "maya": maya,
+            "maya.cmds": cmds,
+            "maya.mel": mel,
+            "maya.OpenMayaUI": omui,
+            "maya.utils": utils,
+            "shiboken6": shiboken,
+            "uli_pipe.vendor.Qt": qt,
+            "uli_pipe.vendor.Qt.QtCore": qt_core,
+            "uli_pipe.vendor.Qt.QtGui": qt_gui,
+            "uli_pipe.vendor.Qt.QtWidgets": qt_widgets,
+        }
+    )
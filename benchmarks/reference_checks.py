@@ -0,0 +1,123 @@
+"""Reference implementations of the modelChecker mesh checks over plain arrays.
+
+They follow the Maya iterator versions of modelChecker_commands one component at
+a time, favouring obviousness over speed. Each takes a synthetic_meshes.MeshArrays
+and returns the ids of the failing components.
+"""
+
+import math
+
+
+def _faces(mesh):
+    # Yield (face id, vertex ids, uv ids) for each face
+    vertex_offset = uv_offset = 0
+    for face, count in enumerate(mesh.polygonCounts):
+        uv_count = mesh.uvCounts[face]
+        yield (
+            face,
+            mesh.polygonConnects[vertex_offset : vertex_offset + count],
+            mesh.uvIds[uv_offset : uv_offset + uv_count],
+        )
+        vertex_offset += count
+        uv_offset += uv_count
+
+
+def _edge_face_counts(mesh):
+    edge_ids = {}
+    for edge in range(mesh.numEdges):
+        a, b = mesh.edgeVertices[2 * edge], mesh.edgeVertices[2 * edge + 1]
+        edge_ids[(min(a, b), max(a, b))] = edge
+    counts = [0] * mesh.numEdges
+    for _, vertices, _ in _faces(mesh):
+        for index, a in enumerate(vertices):
+            b = vertices[(index + 1) % len(vertices)]
+            counts[edge_ids[(min(a, b), max(a, b))]] += 1
+    return counts
+
+
+def triangles(mesh):
+    return [face for face, count in enumerate(mesh.polygonCounts) if count == 3]
+
+
+def ngons(mesh):
+    return [face for face, count in enumerate(mesh.polygonCounts) if count > 4]
+
+
+def openEdges(mesh):
+    return [edge for edge, count in enumerate(_edge_face_counts(mesh)) if count < 2]
+
+
+def noneManifoldEdges(mesh):
+    return [edge for edge, count in enumerate(_edge_face_counts(mesh)) if count > 2]
+
+
+def hardEdges(mesh):
+    counts = _edge_face_counts(mesh)
+    return [edge for edge in range(mesh.numEdges) if not mesh.edgeSmooth[edge] and counts[edge] >= 2]  # fmt: skip
+
+
+def poles(mesh):
+    valences = [0] * mesh.numVertices
+    for vertex in mesh.edgeVertices:
+        valences[vertex] += 1
+    return [vertex for vertex, valence in enumerate(valences) if valence > 5]
+
+
+def _point(mesh, vertex):
+    return mesh.points[3 * vertex : 3 * vertex + 3]
+
+
+def zeroAreaFaces(mesh):
+    zero_area = []
+    for face, vertices, _ in _faces(mesh):
+        # Newell's method, half the norm of the summed cross products
+        nx = ny = nz = 0.0
+        for index, a in enumerate(vertices):
+            x1, y1, z1 = _point(mesh, a)
+            x2, y2, z2 = _point(mesh, vertices[(index + 1) % len(vertices)])
+            nx += (y1 - y2) * (z1 + z2)
+            ny += (z1 - z2) * (x1 + x2)
+            nz += (x1 - x2) * (y1 + y2)
+        if math.sqrt(nx * nx + ny * ny + nz * nz) / 2 <= 0.00000001:
+            zero_area.append(face)
+    return zero_area
+
+
+def zeroLengthEdges(mesh):
+    zero_length = []
+    for edge in range(mesh.numEdges):
+        a = _point(mesh, mesh.edgeVertices[2 * edge])
+        b = _point(mesh, mesh.edgeVertices[2 * edge + 1])
+        if math.dist(a, b) <= 0.00000001:
+            zero_length.append(edge)
+    return zero_length
+
+
+def missingUVs(mesh):
+    return [face for face, count in enumerate(mesh.uvCounts) if count == 0]
+
+
+def uvRange(mesh):
+    return [uv for uv in range(mesh.numUVs) if mesh.us[uv] < 0 or mesh.us[uv] > 10 or mesh.vs[uv] < 0]  # fmt: skip
+
+
+def onBorder(mesh):
+    on_border = []
+    for uv in range(mesh.numUVs):
+        u, v = mesh.us[uv], mesh.vs[uv]
+        if abs(int(u) - u) < 0.00001 or abs(int(v) - v) < 0.00001:
+            on_border.append(uv)
+    return on_border
+
+
+def crossBorder(mesh):
+    cross_border = []
+    for face, _, uvs in _faces(mesh):
+        if not uvs:
+            continue
+        # Same tile rule as modelChecker_commands, where 0 falls in the -1 tile
+        tiles_u = {int(mesh.us[uv]) if mesh.us[uv] > 0 else int(mesh.us[uv]) - 1 for uv in uvs}
+        tiles_v = {int(mesh.vs[uv]) if mesh.vs[uv] > 0 else int(mesh.vs[uv]) - 1 for uv in uvs}
+        if len(tiles_u) > 1 or len(tiles_v) > 1:
+            cross_border.append(face)
+    return cross_border
@@ -0,0 +1,302 @@
+"""Synthetic meshes with known defects for the modelChecker checks.
+
+A mesh is a set of flat arrays named after the MFnMesh getters they stand for:
+
+    points           x, y, z of each vertex
+    polygonCounts    number of vertices of each face
+    polygonConnects  vertex ids of each face, face after face
+    edgeVertices     the two vertex ids of each edge, edge after edge
+    edgeSmooth       1 for a smooth edge, 0 for a hard one
+    us, vs           coordinates of each UV
+    uvCounts         number of UVs of each face, 0 for a face without UVs
+    uvIds            UV ids of each face, face after face
+
+The base of every mesh is a closed quad torus with clean UVs and one ring of hard
+edges. Sets of small closed or open components are added next to it, each with
+a defect whose faces, edges, vertices or UVs are recorded while building, so the
+expected result of every check is known without running any check.
+"""
+
+import math
+from array import array
+
+CHECKS = (
+    "triangles",
+    "ngons",
+    "openEdges",
+    "noneManifoldEdges",
+    "poles",
+    "hardEdges",
+    "zeroAreaFaces",
+    "zeroLengthEdges",
+    "missingUVs",
+    "uvRange",
+    "onBorder",
+    "crossBorder",
+    "selfPenetratingUVs",
+)
+
+FACES_PER_DEFECT_SET = 5000
+
+
+class MeshArrays:
+    def __init__(self):
+        self.points = array("d")
+        self.polygonCounts = array("i")
+        self.polygonConnects = array("i")
+        self.edgeVertices = array("i")
+        self.edgeSmooth = array("b")
+        self.us = array("d")
+        self.vs = array("d")
+        self.uvCounts = array("i")
+        self.uvIds = array("i")
+
+    @property
+    def numVertices(self):
+        return len(self.points) // 3
+
+    @property
+    def numPolygons(self):
+        return len(self.polygonCounts)
+
+    @property
+    def numEdges(self):
+        return len(self.edgeSmooth)
+
+    @property
+    def numUVs(self):
+        return len(self.us)
+
+
+class _MeshBuilder:
+    def __init__(self):
+        self.mesh = MeshArrays()
+        self.expected = {check: [] for check in CHECKS}
+        self.edges = {}
+        self.torus_grid = (0, 0)
+
+    def vertex(self, x, y, z):
+        self.mesh.points.extend((x, y, z))
+        return self.mesh.numVertices - 1
+
+    def uv(self, u, v):
+        self.mesh.us.append(u)
+        self.mesh.vs.append(v)
+        return self.mesh.numUVs - 1
+
+    def edge(self, a, b, smooth=True):
+        key = (a, b) if a < b else (b, a)
+        if key not in self.edges:
+            self.edges[key] = self.mesh.numEdges
+            self.mesh.edgeVertices.extend(key)
+            self.mesh.edgeSmooth.append(1 if smooth else 0)
+        return self.edges[key]
+
+    def face(self, vertices, uvs=None):
+        """Add a face, with generated UVs inside the (0, 0) tile unless given."""
+        mesh = self.mesh
+        for index, vertex in enumerate(vertices):
+            self.edge(vertex, vertices[(index + 1) % len(vertices)])
+        if uvs is None:
+            step = 0.4 / len(vertices)
+            uvs = [self.uv(0.3 + step * i, 0.7 - step * i) for i in range(len(vertices))]
+        mesh.polygonCounts.append(len(vertices))
+        mesh.polygonConnects.extend(vertices)
+        mesh.uvCounts.append(len(uvs))
+        mesh.uvIds.extend(uvs)
+        return mesh.numPolygons - 1
+
+    def box(self, origin, size=(1.0, 1.0, 1.0), uvs=None):
+        """Add a closed box and return its 8 vertices and 6 faces.
+
+        The UVs are generated when uvs is None, left out when it is an empty list,
+        or given as one list of 4 UV ids per face.
+        """
+        ox, oy, oz = origin
+        sx, sy, sz = size
+        v = [
+            self.vertex(ox + sx * x, oy + sy * y, oz + sz * z)
+            for y in (0, 1)
+            for z in (0, 1)
+            for x in (0, 1)
+        ]
+        quads = [
+            (v[0], v[1], v[3], v[2]),  # bottom
+            (v[4], v[6], v[7], v[5]),  # top
+            (v[0], v[4], v[5], v[1]),  # front
+            (v[1], v[5], v[7], v[3]),  # right
+            (v[3], v[7], v[6], v[2]),  # back
+            (v[2], v[6], v[4], v[0]),  # left
+        ]
+        faces = []
+        for index, quad in enumerate(quads):
+            faces.append(self.face(quad, uvs=uvs[index] if uvs else uvs))
+        return v, faces
+
+    def torus(self, rings: int, sides: int, major_radius: float = 10.0, minor_radius: float = 3.0):
+        """Add the closed quad torus, its edges are numbered arithmetically.
+
+        The edge from (i, j) to (i, j + 1) is 2 * (i * sides + j) and the edge from
+        (i, j) to (i + 1, j) is 2 * (i * sides + j) + 1. The first ring of edges is hard.
+        """
+        mesh = self.mesh
+        self.torus_grid = (rings, sides)
+        for i in range(rings):
+            theta = 2 * math.pi * i / rings
+            for j in range(sides):
+                phi = 2 * math.pi * j / sides
+                radius = major_radius + minor_radius * math.cos(phi)
+                mesh.points.extend((radius * math.cos(theta), minor_radius * math.sin(phi), radius * math.sin(theta)))  # fmt: skip
+                mesh.edgeVertices.extend((i * sides + j, i * sides + (j + 1) % sides))
+                mesh.edgeVertices.extend((i * sides + j, (i + 1) % rings * sides + j))
+                mesh.edgeSmooth.extend((0 if i == 0 else 1, 1))
+                if i == 0:
+                    self.expected["hardEdges"].append(2 * j)
+
+        # UVs are an open (rings + 1) x (sides + 1) grid kept inside the (0, 0) tile
+        for i in range(rings + 1):
+            for j in range(sides + 1):
+                self.uv(0.001 + 0.998 * j / sides, 0.001 + 0.998 * i / rings)
+
+        for i in range(rings):
+            next_i = (i + 1) % rings
+            for j in range(sides):
+                next_j = (j + 1) % sides
+                mesh.polygonConnects.extend((i * sides + j, i * sides + next_j, next_i * sides + next_j, next_i * sides + j))  # fmt: skip
+                mesh.uvIds.extend((i * (sides + 1) + j, i * (sides + 1) + j + 1, (i + 1) * (sides + 1) + j + 1, (i + 1) * (sides + 1) + j))  # fmt: skip
+        mesh.polygonCounts.extend([4] * (rings * sides))
+        mesh.uvCounts.extend([4] * (rings * sides))
+
+    def torus_faces_under(self, u_min, u_max, v_min, v_max, tolerance=0.000001):
+        """Return the torus faces whose UVs overlap a UV rectangle by more than the tolerance."""
+        rings, sides = self.torus_grid
+        faces = []
+        for i in range(rings):
+            face_v = (0.001 + 0.998 * i / rings, 0.001 + 0.998 * (i + 1) / rings)
+            if min(face_v[1], v_max) - max(face_v[0], v_min) <= tolerance:
+                continue
+            for j in range(sides):
+                face_u = (0.001 + 0.998 * j / sides, 0.001 + 0.998 * (j + 1) / sides)
+                if min(face_u[1], u_max) - max(face_u[0], u_min) > tolerance:
+                    faces.append(i * sides + j)
+        return faces
+
+    def defect_set(self, x: float, tile: int = 0):
+        """Add one component per defect, side by side along the x axis from x.
+
+        The UV defects of each set are moved 20 tiles along u per tile index, so
+        only the first set has UVs overlapping the torus, and all the UVs of the
+        other sets are out of the 0 to 10 range.
+        """
+        expected = self.expected
+
+        # Tetrahedron: 4 triangles
+        v = [self.vertex(x, 0, 0), self.vertex(x + 1, 0, 0), self.vertex(x, 0, 1), self.vertex(x, 1, 0)]
+        for tri in ((v[0], v[2], v[1]), (v[0], v[1], v[3]), (v[1], v[2], v[3]), (v[2], v[0], v[3])):
+            expected["triangles"].append(self.face(tri))
+
+        # Hexagonal prism: 2 ngons
+        x += 3
+        bottom = [self.vertex(x + math.cos(a * math.pi / 3), 0, math.sin(a * math.pi / 3)) for a in range(6)]  # fmt: skip
+        top = [self.vertex(x + math.cos(a * math.pi / 3), 1, math.sin(a * math.pi / 3)) for a in range(6)]  # fmt: skip
+        expected["ngons"].append(self.face(bottom[::-1]))
+        expected["ngons"].append(self.face(top))
+        for a in range(6):
+            self.face((bottom[a], bottom[(a + 1) % 6], top[(a + 1) % 6], top[a]))
+
+        # Octagonal bipyramid: 16 triangles and 2 poles of valence 8
+        x += 3
+        ring = [self.vertex(x + math.cos(a * math.pi / 4), 0, math.sin(a * math.pi / 4)) for a in range(8)]  # fmt: skip
+        apexes = [self.vertex(x, 1, 0), self.vertex(x, -1, 0)]
+        expected["poles"].extend(apexes)
+        for a in range(8):
+            expected["triangles"].append(self.face((ring[a], ring[(a + 1) % 8], apexes[0])))
+            expected["triangles"].append(self.face((ring[(a + 1) % 8], ring[a], apexes[1])))
+
+        # Flattened box: 4 zero area sides and 4 zero length edges
+        x += 3
+        v, faces = self.box((x, 0, 0), size=(1.0, 0.0, 1.0))
+        expected["zeroAreaFaces"].extend(faces[2:])
+        expected["zeroLengthEdges"].extend(self.edges[(v[i], v[i + 4])] for i in range(4))
+
+        # Single quad: 4 open edges, hard but on the boundary so not hard edges, and
+        # UVs folded into a bowtie, which overlaps itself
+        x += 3
+        v = [self.vertex(x, 0, 0), self.vertex(x + 1, 0, 0), self.vertex(x + 1, 0, 1), self.vertex(x, 0, 1)]  # fmt: skip
+        for index in range(4):
+            expected["openEdges"].append(self.edge(v[index], v[(index + 1) % 4], smooth=False))
+        shift = 20.0 * tile
+        folded = [self.uv(u + shift, v) for u, v in ((3.3, 0.3), (3.6, 0.6), (3.6, 0.3), (3.3, 0.6))]
+        expected["selfPenetratingUVs"].append(self.face(v, uvs=folded))
+        if tile > 0:
+            expected["uvRange"].extend(folded)
+
+        # Book of 3 quads sharing an edge: 1 non manifold edge and 9 open edges
+        x += 3
+        spine = [self.vertex(x, 0, 0), self.vertex(x, 1, 0)]
+        expected["noneManifoldEdges"].append(self.edge(spine[0], spine[1]))
+        for angle in (0, 2 * math.pi / 3, 4 * math.pi / 3):
+            page = [self.vertex(x + math.cos(angle), y, math.sin(angle)) for y in (0, 1)]
+            expected["openEdges"].append(self.edge(spine[1], page[1]))
+            expected["openEdges"].append(self.edge(page[1], page[0]))
+            expected["openEdges"].append(self.edge(page[0], spine[0]))
+            self.face((spine[0], spine[1], page[1], page[0]))
+
+        # Box without UVs: 6 faces missing UVs
+        x += 3
+        _, faces = self.box((x, 0, 0), uvs=[])
+        expected["missingUVs"].extend(faces)
+
+        # Box with UV defects
+        x += 3
+        rectangles = (
+            ((0.9, 1.1), (0.3, 0.6)),  # crosses u = 1, over the torus in the first set
+            ((1.8, 2.2), (0.3, 0.6)),  # crosses u = 2, overlaps the fifth face
+            ((11.2, 11.5), (0.3, 0.6)),  # beyond u = 10
+            ((0.3, 0.6), (-0.5, -0.2)),  # below v = 0
+            ((2.0, 2.5), (0.3, 0.6)),  # two UVs on u = 2, overlaps the second face
+            ((0.3, 0.6), (0.3, 0.6)),  # over the torus in the first set
+        )
+        uvs = []
+        for us, vs in rectangles:
+            us = (us[0] + shift, us[1] + shift)
+            uvs.append([self.uv(us[0], vs[0]), self.uv(us[1], vs[0]), self.uv(us[1], vs[1]), self.uv(us[0], vs[1])])  # fmt: skip
+        _, faces = self.box((x, 0, 0), uvs=uvs)
+        expected["crossBorder"].extend(faces[:2])
+        expected["uvRange"].extend(uvs[2] + uvs[3])
+        if tile > 0:
+            # Moved beyond u = 10 with the rest of the set
+            for index in (0, 1, 4, 5):
+                expected["uvRange"].extend(uvs[index])
+        expected["onBorder"].extend((uvs[4][0], uvs[4][3]))
+        expected["selfPenetratingUVs"].extend((faces[1], faces[4]))
+        if tile == 0:
+            expected["selfPenetratingUVs"].extend((faces[0], faces[5]))
+            for index in (0, 5):
+                (u_min, u_max), (v_min, v_max) = rectangles[index]
+                expected["selfPenetratingUVs"].extend(self.torus_faces_under(u_min, u_max, v_min, v_max))
+
+
+def generate_mesh(faces: int, defect_sets: int = None):
+    """Generate a mesh of about the given number of faces with known defects.
+
+    Args:
+        faces (int): Approximate number of faces.
+        defect_sets (int): Number of defect sets, by default one per
+            FACES_PER_DEFECT_SET faces.
+
+    Returns:
+        tuple: The MeshArrays and the expected result of each check as sorted lists.
+    """
+    if defect_sets is None:
+        defect_sets = max(1, faces // FACES_PER_DEFECT_SET)
+    rings = max(3, int(math.sqrt(faces)))
+    sides = max(3, faces // rings)
+
+    builder = _MeshBuilder()
+    builder.torus(rings, sides)
+    for index in range(defect_sets):
+        builder.defect_set(x=20.0 + index * 30.0, tile=index)
+
+    expected = {check: sorted(ids) for check, ids in builder.expected.items()}
+    return builder.mesh, expected
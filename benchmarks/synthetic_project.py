@@ -0,0 +1,125 @@
+"""Generate a synthetic ESMA project tree for the benchmarks.
+
+The layout mirrors what UliPipe expects:
+
+    04_asset/<type>/<name>/maya/scenes/edit/<dept>/<name>_<dept>_E_NNN.ma
+    04_asset/<type>/<name>/maya/scenes/publish/<dept>/<name>_<dept>_P.mb
+    04_asset/<type>/<name>/maya/scenes/publish/<dept>/backup/<name>_<dept>_P_NNN.mb
+    05_shot/sqNNNN/sqNNNN_shNNNN/maya/scenes/<dept>/edit/sqNNNN_shNNNN_<dept>_E_NNN.ma
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+ASSET_TYPES = ("character", "FX", "item", "prop", "set")
+ASSET_DEPARTMENTS = ("assetLayout", "cloth", "dressing", "groom", "lookdev", "modeling", "rig")
+SHOT_DEPARTMENTS = ("anim", "layout", "render")
+SHOTS_PER_SEQUENCE = 50
+
+
+def _touch(path: Path):
+    with open(path, "wb"):
+        pass
+
+
+def _create_template_asset(template_path: Path):
+    for dept in ASSET_DEPARTMENTS:
+        (template_path / "maya" / "scenes" / "edit" / dept).mkdir(parents=True)
+        (template_path / "maya" / "scenes" / "publish" / dept).mkdir(parents=True)
+    (template_path / "sculpt" / "zbrush" / "input").mkdir(parents=True)
+    (template_path / "sculpt" / "zbrush" / "output").mkdir(parents=True)
+
+
+def _create_template_shot(template_path: Path):
+    for dept in SHOT_DEPARTMENTS:
+        (template_path / "maya" / "scenes" / dept / "edit").mkdir(parents=True)
+        (template_path / "maya" / "scenes" / dept / "publish").mkdir(parents=True)
+
+
+def asset_names(count: int):
+    """Return (asset_type, name) pairs spread over the asset types."""
+    return [(ASSET_TYPES[i % len(ASSET_TYPES)], f"asset{i:05d}") for i in range(count)]
+
+
+def shot_names(count: int):
+    """Return (sequence, shot) pairs with SHOTS_PER_SEQUENCE shots per sequence."""
+    names = []
+    for i in range(count):
+        sequence = f"sq{(i // SHOTS_PER_SEQUENCE + 1) * 10:04d}"
+        names.append((sequence, f"{sequence}_sh{(i % SHOTS_PER_SEQUENCE + 1) * 10:04d}"))
+    return names
+
+
+def generate_project(
+    root: Path,
+    assets: int = 1000,
+    shots: int = 200,
+    versions: int = 20,
+    backups: int = 5,
+    asset_departments=("modeling",),
+    shot_departments=("anim",),
+):
+    """Create a synthetic project tree under the given root.
+
+    Args:
+        root (Path): Directory of the project, created if needed.
+        assets (int): Number of assets.
+        shots (int): Number of shots.
+        versions (int): Number of '_E_NNN' edits per asset/shot department.
+        backups (int): Number of publish backups per asset department.
+        asset_departments (tuple): Departments receiving edits and publishes.
+        shot_departments (tuple): Departments receiving edits.
+
+    Returns:
+        int: Number of files created.
+    """
+    asset_dirpath = root / "04_asset"
+    shot_dirpath = root / "05_shot"
+    files = 0
+
+    _create_template_asset(asset_dirpath / "_template_workspace_asset")
+    _create_template_shot(shot_dirpath / "_template_workspace_shot")
+
+    for asset_type, name in asset_names(assets):
+        asset_path = asset_dirpath / asset_type / name
+        _create_template_asset(asset_path)
+        for dept in asset_departments:
+            edit_path = asset_path / "maya" / "scenes" / "edit" / dept
+            for version in range(1, versions + 1):
+                _touch(edit_path / f"{name}_{dept}_E_{version:03d}.ma")
+            publish_path = asset_path / "maya" / "scenes" / "publish" / dept
+            _touch(publish_path / f"{name}_{dept}_P.mb")
+            if backups:
+                (publish_path / "backup").mkdir()
+            for backup in range(1, backups + 1):
+                _touch(publish_path / "backup" / f"{name}_{dept}_P_{backup:03d}.mb")
+            files += versions + backups + 1
+
+    for sequence, name in shot_names(shots):
+        shot_path = shot_dirpath / sequence / name
+        _create_template_shot(shot_path)
+        for dept in shot_departments:
+            edit_path = shot_path / "maya" / "scenes" / dept / "edit"
+            for version in range(1, versions + 1):
+                _touch(edit_path / f"{name}_{dept}_E_{version:03d}.ma")
+            files += versions
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic UliPipe project tree")
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--assets", type=int, default=1000)
+    parser.add_argument("--shots", type=int, default=200)
+    parser.add_argument("--versions", type=int, default=20)
+    parser.add_argument("--backups", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files = generate_project(args.root, args.assets, args.shots, args.versions, args.backups)
+    print(f"Created {files} files in '{args.root}' in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()